@@ -5,5 +5,23 @@
 # * If neither is available, we raise -> ProviderError.
 
 from .manager import AgentManager, EmbeddingManager
+from .cache import pack_embedding, unpack_embedding
+from .registry import provider_registry
+from .deadline import deadline_after
+from .admission import admission_controller
+from .exceptions import DeadlineExceededError, StrategyError
+from .strategies.streaming import SectionCallback, notify_section
 
-__all__ = ["AgentManager", "EmbeddingManager"]
+__all__ = [
+    "AgentManager",
+    "EmbeddingManager",
+    "pack_embedding",
+    "unpack_embedding",
+    "provider_registry",
+    "SectionCallback",
+    "notify_section",
+    "deadline_after",
+    "DeadlineExceededError",
+    "StrategyError",
+    "admission_controller",
+]
@@ -0,0 +1,215 @@
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from app.core import settings
+
+from .providers.base import Provider
+
+logger = logging.getLogger(__name__)
+
+# lower runs first; interactive requests have a user waiting on them, bulk ones
+# (ingestion) can wait behind them
+PRIORITIES = {"interactive": 0, "bulk": 1}
+DEFAULT_PRIORITY = "interactive"
+
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    """
+    Parses `backend:model=limit` pairs, e.g. `ollama:gemma3:4b=2,openai:gpt-4o=16`.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, limit = item.rpartition("=")
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+class _ModelQueue:
+    def __init__(self, limit: int) -> None:
+        # slots per backend serving the model; `limit` scales it by their count
+        self.base_limit = max(1, limit)
+        self.limit = self.base_limit
+        self.active = 0
+        # (priority, sequence, future, priority name); cancelled waiters are
+        # skipped lazily when popped
+        self.waiters: List[Tuple[int, int, asyncio.Future, str]] = []
+        self.admitted = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def queued(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITIES}
+        for _, _, future, name in self.waiters:
+            if not future.done():
+                depth[name] += 1
+        return depth
+
+
+class AdmissionController:
+    """
+    Bounds how many generations run at once per model and decides who goes next.
+
+    Each model gets `limit` concurrent slots (`limits` overrides per model).
+    Callers beyond that queue by priority, then arrival order, so interactive
+    improve requests overtake queued bulk ingestion. A cancelled waiter (client
+    disconnect, deadline) simply leaves the queue.
+    """
+
+    def __init__(self, default_limit: int, limits: Optional[Dict[str, int]] = None):
+        self._default_limit = default_limit
+        self._limits = limits or {}
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._sequence = itertools.count()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = _ModelQueue(self._limits.get(model, self._default_limit))
+            self._queues[model] = queue
+        return queue
+
+    def _resize(self, queue: _ModelQueue, capacity: int) -> None:
+        # a shrunk limit takes effect as running calls finish (see `_release`),
+        # a grown one admits waiters right away
+        queue.limit = queue.base_limit * max(1, capacity)
+        while queue.active < queue.limit and queue.waiters:
+            _, _, future, _ = heapq.heappop(queue.waiters)
+            if not future.done():
+                future.set_result(None)
+                queue.active += 1
+
+    @asynccontextmanager
+    async def slot(
+        self, model: str, priority: str = DEFAULT_PRIORITY, capacity: int = 1
+    ) -> AsyncIterator[None]:
+        """
+        Holds one of `model`'s slots for the duration of the block. `capacity`
+        is the number of backends currently serving the model; its limit is per
+        backend.
+        """
+        queue = self._queue(model)
+        self._resize(queue, capacity)
+        queued_at = time.monotonic()
+        rank = PRIORITIES[priority]
+        # slots are handed over directly on release, so a free slot means
+        # nobody is waiting
+        if queue.active < queue.limit:
+            queue.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(
+                queue.waiters,
+                (rank, next(self._sequence), future, priority),
+            )
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # the slot was handed over just as we were cancelled
+                    self._release(queue)
+                raise
+
+        waited = time.monotonic() - queued_at
+        queue.admitted += 1
+        queue.wait_total += waited
+        queue.wait_max = max(queue.wait_max, waited)
+        try:
+            yield
+        finally:
+            self._release(queue)
+
+    def _release(self, queue: _ModelQueue) -> None:
+        # hand the slot straight to the next live waiter, so `active` never
+        # drops below the limit while others are queued
+        if queue.active > queue.limit:
+            # over a limit that shrank since this slot was taken
+            queue.active -= 1
+            return
+        while queue.waiters:
+            _, _, future, _ = heapq.heappop(queue.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        queue.active -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Per-model concurrency, queue depth by priority and admission wait times.
+        """
+        return {
+            model: {
+                "limit": queue.limit,
+                "active": queue.active,
+                "queued": queue.queued(),
+                "admitted": queue.admitted,
+                "avg_wait_seconds": queue.wait_total / queue.admitted
+                if queue.admitted
+                else 0.0,
+                "max_wait_seconds": queue.wait_max,
+            }
+            for model, queue in self._queues.items()
+        }
+
+
+class AdmittedProvider(Provider):
+    """
+    Provider proxy that takes an `AdmissionController` slot for every call.
+    `capacity`, if given, returns the number of backends currently serving the
+    model and is re-read on every call.
+    """
+
+    def __init__(
+        self,
+        inner: Provider,
+        controller: AdmissionController,
+        slot_key: str,
+        priority: str = DEFAULT_PRIORITY,
+        capacity: Optional[Callable[[], int]] = None,
+    ) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"unknown priority {priority!r}, expected one of {list(PRIORITIES)}"
+            )
+        self.inner = inner
+        self.model = getattr(inner, "model", None)
+        self._controller = controller
+        self._slot_key = slot_key
+        self._priority = priority
+        self._capacity = capacity
+
+    def _slot(self) -> AsyncContextManager[None]:
+        return self._controller.slot(
+            self._slot_key,
+            self._priority,
+            self._capacity() if self._capacity is not None else 1,
+        )
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        async with self._slot():
+            return await self.inner(prompt, **generation_args)
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        async with self._slot():
+            async for chunk in self.inner.stream(prompt, **generation_args):
+                yield chunk
+
+
+admission_controller = AdmissionController(
+    default_limit=settings.LLM_MAX_CONCURRENCY,
+    limits=_parse_limits(settings.LLM_MODEL_CONCURRENCY),
+)
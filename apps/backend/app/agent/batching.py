@@ -0,0 +1,80 @@
+import asyncio
+import logging
+
+from typing import Dict, List, Set, Tuple
+
+from .exceptions import ProviderError
+from .providers.base import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into `embed_many` calls.
+
+    The first pending text opens a short window; every text submitted before the
+    window closes (or until `max_batch_size` is reached) shares one request with
+    the other texts for the same provider. Texts bound for different providers,
+    e.g. different OpenAI keys, are never sent together.
+    """
+
+    def __init__(self, window: float, max_batch_size: int) -> None:
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending: Dict[EmbeddingProvider, List[Tuple[str, asyncio.Future]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def submit(self, provider: EmbeddingProvider, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(provider, [])
+        pending.append((text, future))
+
+        if len(pending) >= self._max_batch_size:
+            self._dispatch(provider)
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        self._timer = None
+        for provider in list(self._pending):
+            self._dispatch(provider)
+
+    def _dispatch(self, provider: EmbeddingProvider) -> None:
+        batch = self._pending.pop(provider, [])
+        if not self._pending and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run(provider, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(
+        self, provider: EmbeddingProvider, batch: List[Tuple[str, asyncio.Future]]
+    ) -> None:
+        # identical texts within one window are embedded only once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        logger.debug(f"embedding batch of {len(texts)} texts ({len(batch)} callers)")
+        try:
+            embeddings = await provider.embed_many(texts)
+            if len(embeddings) != len(texts):
+                raise ProviderError(
+                    f"expected {len(texts)} embeddings, provider returned {len(embeddings)}"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text: Dict[str, List[float]] = dict(zip(texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
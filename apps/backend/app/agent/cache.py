@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+from fastapi.concurrency import run_in_threadpool
+
+from app.core import settings
+
+logger = logging.getLogger(__name__)
+
+def embedding_key(model: str, text: str) -> str:
+    """
+    Content-addressed cache key for an embedding: digest of model name + text.
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def pack_embedding(embedding: Sequence[float] | np.ndarray) -> bytes:
+    """
+    Serializes an embedding into a compact float32 blob.
+    """
+    return np.asarray(embedding, dtype=np.float32).ravel().tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    """
+    Deserializes a float32 blob produced by `pack_embedding`.
+    """
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed embedding cache.
+
+    * In-process LRU bounded by the total byte size of the stored vectors.
+    * Optional SQLite tier on disk, shared across restarts and workers.
+    """
+
+    def __init__(self, max_bytes: int, path: Optional[str] = None) -> None:
+        self._max_bytes = max_bytes
+        self._path = path
+        self._lru: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if not self._path:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, "
+                "model TEXT NOT NULL, "
+                "dim INTEGER NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        with self._lock:
+            if key in self._lru:
+                self._size -= len(self._lru.pop(key))
+            if len(blob) > self._max_bytes:
+                return
+            self._lru[key] = blob
+            self._size += len(blob)
+            while self._size > self._max_bytes:
+                _, evicted = self._lru.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _lookup_memory(self, key: str) -> bytes | None:
+        with self._lock:
+            blob = self._lru.get(key)
+            if blob is not None:
+                self._lru.move_to_end(key)
+            return blob
+
+    def _lookup_disk(self, key: str) -> bytes | None:
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _store_disk(self, key: str, model: str, blob: bytes) -> None:
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, len(blob) // 4, blob, time.time()),
+            )
+            conn.commit()
+
+    async def get(self, model: str, text: str) -> List[float] | None:
+        """
+        Returns the cached embedding for `text` under `model`, or None on a miss.
+        """
+        key = embedding_key(model, text)
+        blob = self._lookup_memory(key)
+        if blob is None:
+            try:
+                blob = await run_in_threadpool(self._lookup_disk, key)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"embedding cache read failed: {e}")
+                blob = None
+            if blob is None:
+                return None
+            self._remember(key, blob)
+        return unpack_embedding(blob).tolist()
+
+    async def set(
+        self, model: str, text: str, embedding: Sequence[float] | np.ndarray
+    ) -> List[float]:
+        """
+        Stores the embedding in both tiers and returns it as a flat list.
+        """
+        key = embedding_key(model, text)
+        blob = pack_embedding(embedding)
+        self._remember(key, blob)
+        try:
+            await run_in_threadpool(self._store_disk, key, model, blob)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"embedding cache write failed: {e}")
+        return unpack_embedding(blob).tolist()
+
+
+def response_key(parts: Dict[str, Any]) -> str:
+    """
+    Content-addressed cache key for an LLM response: digest of everything that
+    determines it (strategy, model, prompt and generation options).
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of parsed LLM responses.
+
+    Bounded by the total byte size of the stored values; once over the limit
+    the least recently read entries are evicted first.
+    """
+
+    def __init__(self, max_bytes: int, path: Optional[str] = None) -> None:
+        self._max_bytes = max_bytes
+        self._path = path
+        self._db_lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path) and self._max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _lookup(self, key: str) -> str | None:
+        with self._db_lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+        return row[0]
+
+    def _store(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            excess = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0] - self._max_bytes
+            if excess > 0:
+                evicted = []
+                for evict_key, evict_size in conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at"
+                ):
+                    if excess <= 0:
+                        break
+                    evicted.append((evict_key,))
+                    excess -= evict_size
+                conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            conn.commit()
+
+    async def get(self, key: str) -> Any | None:
+        """
+        Returns the cached response for `key`, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        try:
+            value = await run_in_threadpool(self._lookup, key)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"response cache read failed: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, response: Any) -> None:
+        """
+        Stores a JSON-serializable response under `key`.
+        """
+        if not self.enabled:
+            return
+        try:
+            await run_in_threadpool(self._store, key, json.dumps(response))
+        except (sqlite3.Error, OSError, TypeError) as e:
+            logger.warning(f"response cache write failed: {e}")
+
+
+embedding_cache = EmbeddingCache(
+    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+    path=settings.EMBEDDING_CACHE_PATH,
+)
+response_cache = ResponseCache(
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    path=settings.LLM_CACHE_PATH,
+)
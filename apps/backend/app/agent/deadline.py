@@ -0,0 +1,42 @@
+import time
+import asyncio
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from .exceptions import DeadlineExceededError
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """
+    Absolute deadline (a `time.monotonic()` value) `seconds` from now, or None
+    for no deadline.
+    """
+    return time.monotonic() + seconds if seconds else None
+
+
+def time_remaining(deadline: Optional[float]) -> Optional[float]:
+    """
+    Seconds left until `deadline` (never negative), or None without one.
+    """
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@asynccontextmanager
+async def enforce_deadline(deadline: Optional[float]) -> AsyncIterator[None]:
+    """
+    Cancels the enclosed awaits once `deadline` passes and raises
+    `DeadlineExceededError` instead. Cancelling an in-flight provider request
+    closes its connection, which makes Ollama abort the generation.
+    """
+    if deadline is None:
+        yield
+        return
+    # the event loop clock is time.monotonic() on the default loops
+    try:
+        async with asyncio.timeout_at(deadline):
+            yield
+    except TimeoutError:
+        raise DeadlineExceededError("request deadline exceeded") from None
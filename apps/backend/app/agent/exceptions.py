@@ -2,5 +2,18 @@ class ProviderError(RuntimeError):
     """Raised when the underlying LLM provider fails"""
 
 
+class DeadlineExceededError(ProviderError):
+    """Raised when a call's `deadline` passes before the provider has answered"""
+
+
 class StrategyError(RuntimeError):
     """Raised when a Strategy cannot parse/return expected output"""
+
+
+class SchemaViolationError(StrategyError):
+    """Raised when a streamed response section does not match the expected schema"""
+
+    def __init__(self, message: str, response: str = "") -> None:
+        super().__init__(message)
+        # the partial response generated up to the violation
+        self.response = response
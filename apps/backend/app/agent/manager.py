@@ -1,65 +1,202 @@
 import os
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, AsyncIterator, List
 
+from app.core import settings
+
+from .cache import embedding_cache, response_cache
+from .batching import EmbeddingBatcher
+from .registry import provider_registry
 from .exceptions import ProviderError
+from .deadline import enforce_deadline
+from .admission import AdmittedProvider, admission_controller, DEFAULT_PRIORITY
+from .strategies.cached import CachedStrategy
 from .strategies.wrapper import JSONWrapper, MDWrapper
+from .strategies.streaming import StreamingJSONWrapper
 from .providers.ollama import OllamaProvider, OllamaEmbeddingProvider
 from .providers.openai import OpenAIProvider, OpenAIEmbeddingProvider
+from .pool import PooledOllamaProvider, PooledOllamaEmbeddingProvider
+
+
+async def _ensure_ollama_model(model: str) -> None:
+    """
+    Raises ProviderError unless `model` is installed. A cached model list that
+    lacks the model is re-fetched once, so freshly pulled models are picked up.
+    """
+    pool = provider_registry.ollama_pool
+    if pool.enabled:
+        if not await pool.has_model(model):
+            raise ProviderError(
+                f"Ollama Model '{model}' is not found on any of the configured OLLAMA_HOSTS. Run `ollama pull {model}` on at least one of them."
+            )
+        return
+
+    client = provider_registry.ollama_client()
+    installed_ollama_models = await OllamaProvider.get_installed_models(client=client)
+    if model not in installed_ollama_models:
+        installed_ollama_models = await OllamaProvider.get_installed_models(
+            client=client, use_cache=False
+        )
+    if model not in installed_ollama_models:
+        raise ProviderError(
+            f"Ollama Model '{model}' is not found. Run `ollama pull {model} or pick from any available models {installed_ollama_models}"
+        )
 
 
 class AgentManager:
-    def __init__(self, strategy: str | None = None, model: str = "gemma3:4b") -> None:
+    def __init__(
+        self,
+        strategy: str | None = None,
+        model: str = "gemma3:4b",
+        cache: bool = True,
+    ) -> None:
         match strategy:
             case "md":
                 self.strategy = MDWrapper()
             case "json":
                 self.strategy = JSONWrapper()
+            case "json_stream":
+                self.strategy = StreamingJSONWrapper()
             case _:
                 self.strategy = JSONWrapper()
+        if cache and response_cache.enabled:
+            self.strategy = CachedStrategy(self.strategy, response_cache)
         self.model = model
 
-    async def _get_provider(self, **kwargs: Any) -> OllamaProvider | OpenAIProvider:
+    async def _get_provider(
+        self, **kwargs: Any
+    ) -> OllamaProvider | PooledOllamaProvider | OpenAIProvider:
         api_key = kwargs.get("openai_api_key", os.getenv("OPENAI_API_KEY"))
         if api_key:
-            return OpenAIProvider(api_key=api_key)
+            return provider_registry.openai(api_key=api_key)
 
         model = kwargs.get("model", self.model)
-        installed_ollama_models = await OllamaProvider.get_installed_models()
-        if model not in installed_ollama_models:
-            raise ProviderError(
-                f"Ollama Model '{model}' is not found. Run `ollama pull {model} or pick from any available models {installed_ollama_models}"
-            )
-        return OllamaProvider(model_name=model)
+        await _ensure_ollama_model(model)
+        if provider_registry.ollama_pool.enabled:
+            return provider_registry.ollama_pooled(model)
+        return provider_registry.ollama(model)
+
+    async def _get_admitted_provider(self, **kwargs: Any) -> AdmittedProvider:
+        """
+        Wraps the provider so every generation waits for a slot of its model in
+        the shared `admission_controller`, queued by `priority`
+        ("interactive" or "bulk").
+        """
+        provider = await self._get_provider(**kwargs)
+        backend = "openai" if isinstance(provider, OpenAIProvider) else "ollama"
+        return AdmittedProvider(
+            provider,
+            admission_controller,
+            slot_key=f"{backend}:{provider.model}",
+            priority=kwargs.get("priority", DEFAULT_PRIORITY),
+            # every pooled host serving the model gets its own share of
+            # concurrent generations
+            capacity=provider.capacity
+            if isinstance(provider, PooledOllamaProvider)
+            else None,
+        )
 
     async def run(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
         """
         Run the agent with the given prompt and generation arguments.
+        Deterministic calls are served from the response cache unless
+        `use_cache=False` is passed. With `deadline` (see `deadline_after`) the
+        call is cancelled and raises `DeadlineExceededError` once it passes.
         """
-        provider = await self._get_provider(**kwargs)
-        return await self.strategy(prompt, provider, **kwargs)
+        async with enforce_deadline(kwargs.get("deadline")):
+            provider = await self._get_admitted_provider(**kwargs)
+            return await self.strategy(prompt, provider, **kwargs)
+
+    async def stream(self, prompt: str, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream raw response chunks for the given prompt as they are generated.
+        `self.strategy.parse` turns the concatenated chunks into what `run` returns.
+        """
+        deadline = kwargs.get("deadline")
+        async with enforce_deadline(deadline):
+            provider = await self._get_admitted_provider(**kwargs)
+        chunks = self.strategy.stream(prompt, provider, **kwargs)
+        try:
+            while True:
+                # the deadline only covers waiting on the provider, not the
+                # caller's work between chunks
+                async with enforce_deadline(deadline):
+                    try:
+                        chunk = await anext(chunks)
+                    except StopAsyncIteration:
+                        break
+                yield chunk
+        finally:
+            await chunks.aclose()
 
 
 class EmbeddingManager:
+    # shared by every manager instance so concurrent requests are coalesced too
+    _batchers: Dict[str, EmbeddingBatcher] = {}
+
     def __init__(self, model: str = "nomic-embed-text:137m-v1.5-fp16") -> None:
         self._model = model
 
+    def model_name(self, **kwargs: Any) -> str:
+        """
+        Resolves the backend + model that `_get_embedding_provider` would pick,
+        without querying the backend, e.g. `ollama:nomic-embed-text:137m-v1.5-fp16`.
+        """
+        api_key = kwargs.get("openai_api_key", os.getenv("OPENAI_API_KEY"))
+        if api_key:
+            return f"openai:{OpenAIEmbeddingProvider.DEFAULT_MODEL}"
+        return f"ollama:{kwargs.get('embedding_model', self._model)}"
+
     async def _get_embedding_provider(
         self, **kwargs: Any
-    ) -> OllamaEmbeddingProvider | OpenAIEmbeddingProvider:
+    ) -> (
+        OllamaEmbeddingProvider
+        | PooledOllamaEmbeddingProvider
+        | OpenAIEmbeddingProvider
+    ):
         api_key = kwargs.get("openai_api_key", os.getenv("OPENAI_API_KEY"))
         if api_key:
-            return OpenAIEmbeddingProvider(api_key=api_key)
+            return provider_registry.openai_embedding(api_key=api_key)
         model = kwargs.get("embedding_model", self._model)
-        installed_ollama_models = await OllamaProvider.get_installed_models()
-        if model not in installed_ollama_models:
-            raise ProviderError(
-                f"Ollama Model '{model}' is not found. Run `ollama pull {model} or pick from any available models {installed_ollama_models}"
+        await _ensure_ollama_model(model)
+        if provider_registry.ollama_pool.enabled:
+            return provider_registry.ollama_pooled_embedding(model)
+        return provider_registry.ollama_embedding(model)
+
+    def _get_batcher(self, namespace: str) -> EmbeddingBatcher:
+        batcher = self._batchers.get(namespace)
+        if batcher is None:
+            batcher = EmbeddingBatcher(
+                window=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+                max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
             )
-        return OllamaEmbeddingProvider(embedding_model=model)
+            self._batchers[namespace] = batcher
+        return batcher
 
     async def embed(self, text: str, **kwargs: Any) -> list[float]:
         """
-        Get the embedding for the given text.
+        Get the embedding for the given text, served from the embedding cache when possible.
         """
+        return (await self.embed_many([text], **kwargs))[0]
+
+    async def embed_many(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        """
+        Get embeddings for several texts. Cache misses are micro-batched together
+        with those of other concurrent callers into as few provider requests as possible.
+        """
+        namespace = self.model_name(**kwargs)
+        embeddings = list(
+            await asyncio.gather(*(embedding_cache.get(namespace, t) for t in texts))
+        )
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
         provider = await self._get_embedding_provider(**kwargs)
-        return await provider.embed(text)
+        batcher = self._get_batcher(namespace)
+        fresh = await asyncio.gather(
+            *(batcher.submit(provider, texts[i]) for i in missing)
+        )
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = await embedding_cache.set(namespace, texts[i], embedding)
+        return embeddings
@@ -0,0 +1,402 @@
+import time
+import httpx
+import asyncio
+import logging
+import statistics
+import ollama
+
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from app.prompt import estimate_tokens
+
+from .exceptions import ProviderError
+from .providers.base import Provider, EmbeddingProvider
+from .providers.ollama import OllamaProvider, OllamaEmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _HostState:
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.outstanding = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        # EWMA of seconds per token, per call kind: generated tokens for
+        # "generate", input tokens for "embed"
+        self.latency: Dict[str, float] = {}
+        # installed models as of the last health check, None before the first
+        self.models: Optional[Set[str]] = None
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+
+class _CallStats:
+    """
+    Filled in by the caller of `OllamaHostPool.track` so the call's latency can
+    be normalised by the tokens it processed.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.tokens = 0
+
+
+class OllamaHostPool:
+    """
+    Spreads Ollama calls over several hosts (`OLLAMA_HOSTS`).
+
+    Every call goes to the available host with the fewest outstanding
+    requests, ties going to the lower latency. A host is ejected for
+    `eject_seconds` after `max_failures` consecutive errors, or when its
+    seconds per token exceed `slow_factor` times the median of the other hosts
+    for the same kind of call, so hosts that happen to get the long prompts are
+    not mistaken for slow ones. The last available host is never ejected. A
+    host that cannot be reached is marked down until it passes a health check.
+    The background health check also lists each host's models, so only hosts
+    that have the model are picked.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        client_for: Callable[[str], ollama.AsyncClient],
+        health_interval: float,
+        eject_seconds: float,
+        slow_factor: float,
+        max_failures: int,
+        ewma_alpha: float = 0.3,
+    ) -> None:
+        self._hosts = {host: _HostState(host) for host in hosts}
+        self._client_for = client_for
+        self._health_interval = health_interval
+        self._eject_seconds = eject_seconds
+        self._slow_factor = slow_factor
+        self._max_failures = max(1, max_failures)
+        self._alpha = ewma_alpha
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._hosts)
+
+    def _candidates(
+        self, model: Optional[str], exclude: Collection[str] = ()
+    ) -> List[_HostState]:
+        now = time.monotonic()
+        states = [s for s in self._hosts.values() if s.host not in exclude]
+        if model is not None:
+            # hosts not checked yet might have the model
+            with_model = [
+                s for s in states if s.models is None or model in s.models
+            ]
+            states = with_model or states
+        # with nothing available, trying some host beats failing outright
+        return [s for s in states if s.available(now)] or states
+
+    def pick(
+        self,
+        model: Optional[str] = None,
+        kind: str = "generate",
+        exclude: Collection[str] = (),
+    ) -> Optional[str]:
+        """
+        Returns the host the next `kind` call for `model` should go to, or None
+        if every host is in `exclude`.
+        """
+        candidates = self._candidates(model, exclude)
+        if not candidates:
+            return None
+        return min(
+            candidates, key=lambda s: (s.outstanding, s.latency.get(kind, 0.0))
+        ).host
+
+    def capacity(self, model: str) -> int:
+        """
+        Number of hosts currently serving `model`: available and, as far as the
+        health checks know, having it installed. At least 1.
+        """
+        now = time.monotonic()
+        return max(
+            1,
+            sum(
+                1
+                for s in self._hosts.values()
+                if s.available(now) and (s.models is None or model in s.models)
+            ),
+        )
+
+    @asynccontextmanager
+    async def track(
+        self, host: str, kind: str = "generate"
+    ) -> AsyncIterator[_CallStats]:
+        """
+        Counts a call as outstanding on `host` and records its outcome. The
+        caller sets `tokens` on the yielded stats (and may move `started_at`,
+        e.g. to the first streamed chunk); calls without tokens record no
+        latency.
+        """
+        state = self._hosts[host]
+        state.outstanding += 1
+        state.requests += 1
+        stats = _CallStats()
+        try:
+            yield stats
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            state.errors += 1
+            state.consecutive_failures += 1
+            if _is_connection_error(e):
+                self._mark_down(state, e)
+            elif state.consecutive_failures >= self._max_failures:
+                self._eject(
+                    state, f"{state.consecutive_failures} consecutive failures"
+                )
+            raise
+        else:
+            state.consecutive_failures = 0
+            if stats.tokens > 0:
+                self._record_latency(
+                    state, kind, (time.monotonic() - stats.started_at) / stats.tokens
+                )
+        finally:
+            state.outstanding -= 1
+
+    def _record_latency(
+        self, state: _HostState, kind: str, per_token: float
+    ) -> None:
+        previous = state.latency.get(kind)
+        state.latency[kind] = (
+            per_token
+            if previous is None
+            else self._alpha * per_token + (1 - self._alpha) * previous
+        )
+
+        now = time.monotonic()
+        peers = [
+            s.latency[kind]
+            for s in self._hosts.values()
+            if s is not state and kind in s.latency and s.available(now)
+        ]
+        if not peers:
+            return
+        median = statistics.median(peers)
+        if state.latency[kind] > self._slow_factor * median:
+            self._eject(
+                state,
+                f"{kind} takes {state.latency[kind] * 1000:.1f}ms/token"
+                f" vs peer median {median * 1000:.1f}ms/token",
+            )
+
+    def _eject(self, state: _HostState, reason: str) -> None:
+        now = time.monotonic()
+        if not state.available(now) or not any(
+            s.available(now) for s in self._hosts.values() if s is not state
+        ):
+            return
+        state.ejected_until = now + self._eject_seconds
+        # start over once readmitted rather than being ejected again at once
+        state.latency.clear()
+        state.consecutive_failures = 0
+        logger.warning(
+            f"Ejecting ollama host {state.host} for {self._eject_seconds}s: {reason}"
+        )
+
+    def _mark_down(self, state: _HostState, error: Exception) -> None:
+        if state.healthy:
+            logger.warning(
+                f"ollama host {state.host} is unreachable, skipping it until its"
+                f" next health check: {error}"
+            )
+        state.healthy = False
+
+    async def _check_host(self, state: _HostState) -> None:
+        try:
+            response = await asyncio.wait_for(
+                self._client_for(state.host).list(), timeout=self._health_interval
+            )
+        except Exception as e:
+            if state.healthy:
+                logger.warning(f"ollama host {state.host} failed its health check: {e}")
+            state.healthy = False
+            if state.models is None:
+                # checked, if unsuccessfully; known once the host is back
+                state.models = set()
+            return
+        if not state.healthy:
+            logger.info(f"ollama host {state.host} is healthy again")
+        state.healthy = True
+        state.models = {model.model for model in response.models}
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._check_host(s) for s in self._hosts.values()))
+
+    async def has_model(self, model: str) -> bool:
+        """
+        Whether any host has `model` installed, re-checking the hosts once
+        before answering no so freshly pulled models are picked up.
+        """
+        for refresh in (False, True):
+            if refresh or any(s.models is None for s in self._hosts.values()):
+                await self.check_health()
+            if any(s.models and model in s.models for s in self._hosts.values()):
+                return True
+        return False
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"ollama health check failed: {e}")
+            await asyncio.sleep(self._health_interval)
+
+    def start(self) -> None:
+        if self.enabled and self._health_task is None:
+            self._health_task = asyncio.create_task(
+                self._health_loop(), name="ollama-health-check"
+            )
+
+    async def stop(self) -> None:
+        task, self._health_task = self._health_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Per-host routing state: health, ejection, load, latency and error counts.
+        """
+        now = time.monotonic()
+        return {
+            state.host: {
+                "healthy": state.healthy,
+                "ejected_for_seconds": max(0.0, state.ejected_until - now),
+                "outstanding": state.outstanding,
+                "seconds_per_token": dict(state.latency),
+                "requests": state.requests,
+                "errors": state.errors,
+                "models": sorted(state.models) if state.models is not None else None,
+            }
+            for state in self._hosts.values()
+        }
+
+
+def _is_connection_error(e: Exception) -> bool:
+    # the providers wrap client errors in ProviderError, raised while handling them
+    cause = e.__cause__ or e.__context__
+    return isinstance(cause, (ConnectionError, httpx.TransportError))
+
+
+async def _with_failover(
+    pool: OllamaHostPool,
+    model: str,
+    kind: str,
+    call: Callable[[str, _CallStats], Awaitable[T]],
+) -> T:
+    """
+    Runs `call(host, stats)` on the host the pool picks for `model`, and once
+    more on another host if the first one could not be reached.
+    """
+    host = pool.pick(model, kind)
+    try:
+        async with pool.track(host, kind) as stats:
+            return await call(host, stats)
+    except ProviderError as e:
+        retry = pool.pick(model, kind, exclude={host})
+        if retry is None or not _is_connection_error(e):
+            raise
+        logger.warning(f"ollama host {host} unreachable, retrying on {retry}")
+    async with pool.track(retry, kind) as stats:
+        return await call(retry, stats)
+
+
+class PooledOllamaProvider(Provider):
+    """
+    Routes every generation to a host picked by an `OllamaHostPool`. A call
+    that cannot reach its host is retried once on another one.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        pool: OllamaHostPool,
+        provider_for: Callable[[str], OllamaProvider],
+    ) -> None:
+        self.model = model_name
+        self._pool = pool
+        self._provider_for = provider_for
+
+    def capacity(self) -> int:
+        """
+        Number of hosts currently serving the model, see `OllamaHostPool.capacity`.
+        """
+        return self._pool.capacity(self.model)
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
+        async def _generate(host: str, stats: _CallStats) -> str:
+            response = await self._provider_for(host)(prompt, **generation_args)
+            stats.tokens = estimate_tokens(response)
+            return response
+
+        return await _with_failover(self._pool, self.model, "generate", _generate)
+
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        host = self._pool.pick(self.model)
+        async with self._pool.track(host) as stats:
+            first = True
+            async for chunk in self._provider_for(host).stream(
+                prompt, **generation_args
+            ):
+                # timed from the first chunk, so only decoding speed counts and
+                # not prompt evaluation, which depends on the prompt's length
+                if first:
+                    stats.started_at, first = time.monotonic(), False
+                else:
+                    stats.tokens += estimate_tokens(chunk)
+                yield chunk
+
+
+class PooledOllamaEmbeddingProvider(EmbeddingProvider):
+    """
+    Embedding counterpart of `PooledOllamaProvider`.
+    """
+
+    def __init__(
+        self,
+        embedding_model: str,
+        pool: OllamaHostPool,
+        provider_for: Callable[[str], OllamaEmbeddingProvider],
+    ) -> None:
+        self._model = embedding_model
+        self._pool = pool
+        self._provider_for = provider_for
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        async def _embed(host: str, stats: _CallStats) -> List[List[float]]:
+            stats.tokens = sum(estimate_tokens(text) for text in texts)
+            return await self._provider_for(host).embed_many(texts)
+
+        return await _with_failover(self._pool, self._model, "embed", _embed)
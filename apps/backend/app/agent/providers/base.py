@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, AsyncIterator
 from abc import ABC, abstractmethod
 
 
@@ -10,6 +10,13 @@ class Provider(ABC):
     @abstractmethod
     async def __call__(self, prompt: str, **generation_args: Any) -> str: ...
 
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        """
+        Yield the response in chunks as they are generated. Providers without
+        native streaming yield the whole response once it is complete.
+        """
+        yield await self(prompt, **generation_args)
+
 
 class EmbeddingProvider(ABC):
     """
@@ -18,3 +25,10 @@ class EmbeddingProvider(ABC):
 
     @abstractmethod
     async def embed(self, text: str) -> list[float]: ...
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed several texts. Providers with a native batch endpoint should override
+        this; the default issues one `embed` call per text.
+        """
+        return [await self.embed(text) for text in texts]
@@ -1,8 +1,11 @@
+import time
+import asyncio
 import logging
 import ollama
 
-from typing import Any, Dict, List, Optional
-from fastapi.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core import settings
 
 from ..exceptions import ProviderError
 from .base import Provider, EmbeddingProvider
@@ -10,46 +13,127 @@ from .base import Provider, EmbeddingProvider
 logger = logging.getLogger(__name__)
 
 
+class InstalledModelsCache:
+    """
+    Per-host TTL cache of the installed Ollama models.
+
+    Expired entries keep being served while a single background refresh runs, so
+    only the very first lookup (or one after `invalidate`) waits on Ollama.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._entries: Dict[Optional[str], Tuple[float, List[str]]] = {}
+        self._refreshing: Dict[Optional[str], asyncio.Task] = {}
+
+    async def get(
+        self, host: Optional[str], fetch: Callable[[], Awaitable[List[str]]]
+    ) -> List[str]:
+        entry = self._entries.get(host)
+        if entry is None:
+            models = await fetch()
+            self._entries[host] = (time.monotonic(), models)
+            return models
+
+        fetched_at, models = entry
+        if time.monotonic() - fetched_at > self._ttl and host not in self._refreshing:
+            task = asyncio.create_task(self._refresh(host, fetch))
+            self._refreshing[host] = task
+        return models
+
+    async def _refresh(
+        self, host: Optional[str], fetch: Callable[[], Awaitable[List[str]]]
+    ) -> None:
+        try:
+            self._entries[host] = (time.monotonic(), await fetch())
+        except Exception as e:
+            logger.warning(f"refreshing installed ollama models failed: {e}")
+        finally:
+            self._refreshing.pop(host, None)
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        self._entries.pop(host, None)
+
+
+installed_models_cache = InstalledModelsCache(
+    ttl=settings.OLLAMA_MODELS_TTL_SECONDS
+)
+
+
 class OllamaProvider(Provider):
-    def __init__(self, model_name: str = "gemma3:4b", host: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = "gemma3:4b",
+        host: Optional[str] = None,
+        client: Optional[ollama.AsyncClient] = None,
+    ):
         self.model = model_name
-        self._client = ollama.Client(host=host) if host else ollama.Client()
+        self._host = host
+        self._client = client or ollama.AsyncClient(host=host)
 
     @staticmethod
-    async def get_installed_models(host: Optional[str] = None) -> List[str]:
+    async def get_installed_models(
+        host: Optional[str] = None,
+        client: Optional[ollama.AsyncClient] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
         """
-        List all installed models.
+        List all installed models, served from a short-lived per-host cache.
         """
 
-        def _list_sync() -> List[str]:
-            client = ollama.Client(host=host) if host else ollama.Client()
-            return [model_class.model for model_class in client.list().models]
+        async def _fetch() -> List[str]:
+            _client = client or ollama.AsyncClient(host=host)
+            response = await _client.list()
+            return [model_class.model for model_class in response.models]
 
-        return await run_in_threadpool(_list_sync)
+        if not use_cache:
+            installed_models_cache.invalidate(host)
+        return await installed_models_cache.get(host, _fetch)
 
-    def _generate_sync(self, prompt: str, options: Dict[str, Any]) -> str:
-        """
-        Generate a response from the model.
-        """
+    def _options(self, generation_args: Dict[str, Any]) -> Dict[str, Any]:
+        opts = {
+            "temperature": generation_args.get("temperature", 0),
+            "top_p": generation_args.get("top_p", 0.9),
+            "top_k": generation_args.get("top_k", 40),
+            "num_ctx": generation_args.get("max_length", 20000),
+        }
+        if generation_args.get("seed") is not None:
+            opts["seed"] = generation_args["seed"]
+        return opts
+
+    def _provider_error(self, e: Exception) -> ProviderError:
+        if isinstance(e, ollama.ResponseError) and e.status_code == 404:
+            # model was removed since the installed-models list was cached
+            installed_models_cache.invalidate(self._host)
+        logger.error(f"ollama error: {e}")
+        return ProviderError(f"Ollama - Error generating response: {e}")
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
         try:
-            response = self._client.generate(
+            response = await self._client.generate(
                 prompt=prompt,
                 model=self.model,
-                options=options,
+                options=self._options(generation_args),
+                format=generation_args.get("json_schema"),
             )
             return response["response"].strip()
         except Exception as e:
-            logger.error(f"ollama sync error: {e}")
-            raise ProviderError(f"Ollama - Error generating response: {e}")
+            raise self._provider_error(e)
 
-    async def __call__(self, prompt: str, **generation_args: Any) -> str:
-        opts = {
-            "temperature": generation_args.get("temperature", 0),
-            "top_p": generation_args.get("top_p", 0.9),
-            "top_k": generation_args.get("top_k", 40),
-            "num_ctx": generation_args.get("max_length", 20000),
-        }
-        return await run_in_threadpool(self._generate_sync, prompt, opts)
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        try:
+            chunks = await self._client.generate(
+                prompt=prompt,
+                model=self.model,
+                options=self._options(generation_args),
+                format=generation_args.get("json_schema"),
+                stream=True,
+            )
+            async for chunk in chunks:
+                if chunk["response"]:
+                    yield chunk["response"]
+        except Exception as e:
+            raise self._provider_error(e)
 
 
 class OllamaEmbeddingProvider(EmbeddingProvider):
@@ -57,21 +141,30 @@ class OllamaEmbeddingProvider(EmbeddingProvider):
         self,
         embedding_model: str = "nomic-embed-text:137m-v1.5-fp16",
         host: Optional[str] = None,
+        client: Optional[ollama.AsyncClient] = None,
     ):
         self._model = embedding_model
-        self._client = ollama.Client(host=host) if host else ollama.Client()
+        self._host = host
+        self._client = client or ollama.AsyncClient(host=host)
 
     async def embed(self, text: str) -> List[float]:
         """
         Generate an embedding for the given text.
         """
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts in a single request.
+        """
         try:
-            response = await run_in_threadpool(
-                self._client.embed,
-                input=text,
-                model=self._model,
-            )
-            return response.embeddings
+            response = await self._client.embed(input=texts, model=self._model)
+            return list(response.embeddings)
+        except ollama.ResponseError as e:
+            if e.status_code == 404:
+                installed_models_cache.invalidate(self._host)
+            logger.error(f"ollama embedding error: {e}")
+            raise ProviderError(f"Ollama - Error generating embedding: {e}")
         except Exception as e:
             logger.error(f"ollama embedding error: {e}")
             raise ProviderError(f"Ollama - Error generating embedding: {e}")
@@ -1,10 +1,10 @@
 import os
 import logging
 
-from openai import OpenAI
-from typing import Any, Dict
-from fastapi.concurrency import run_in_threadpool
+from openai import AsyncOpenAI
+from typing import Any, AsyncIterator, Dict, List
 
+from ..deadline import time_remaining
 from ..exceptions import ProviderError
 from .base import Provider, EmbeddingProvider
 
@@ -12,53 +12,100 @@ logger = logging.getLogger(__name__)
 
 
 class OpenAIProvider(Provider):
-    def __init__(self, api_key: str | None = None, model: str = "gpt-4o"):
+    DEFAULT_MODEL = "gpt-4o"
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = DEFAULT_MODEL,
+        client: AsyncOpenAI | None = None,
+    ):
         api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not api_key and client is None:
             raise ProviderError("OpenAI API key is missing")
-        self._client = OpenAI(api_key=api_key)
+        self._client = client or AsyncOpenAI(api_key=api_key)
         self.model = model
         self.instructions = ""
 
-    def _generate_sync(self, prompt: str, options: Dict[str, Any]) -> str:
+    def _options(self, generation_args: Dict[str, Any]) -> Dict[str, Any]:
+        # the Responses API has no top_k, and `max_length` is sized as an Ollama
+        # context window, so only an explicit output cap is forwarded
+        opts = {
+            "temperature": generation_args.get("temperature", 0),
+            "top_p": generation_args.get("top_p", 0.9),
+        }
+        if generation_args.get("max_output_tokens"):
+            opts["max_output_tokens"] = generation_args["max_output_tokens"]
+        if generation_args.get("deadline") is not None:
+            # the SDK would otherwise retry and wait well past the caller's deadline
+            opts["timeout"] = time_remaining(generation_args["deadline"])
+        if generation_args.get("json_schema"):
+            # non-strict: strict mode rejects our nullable-but-required fields
+            # on older models and we validate with pydantic afterwards anyway
+            opts["text"] = {
+                "format": {
+                    "type": "json_schema",
+                    "name": "response",
+                    "schema": generation_args["json_schema"],
+                    "strict": False,
+                }
+            }
+        return opts
+
+    async def __call__(self, prompt: str, **generation_args: Any) -> str:
         try:
-            response = self._client.responses.create(
+            response = await self._client.responses.create(
                 model=self.model,
                 instructions=self.instructions,
                 input=prompt,
-                **options,
+                **self._options(generation_args),
             )
             return response.output_text
         except Exception as e:
             raise ProviderError(f"OpenAI - error generating response: {e}") from e
 
-    async def __call__(self, prompt: str, **generation_args: Any) -> str:
-        opts = {
-            "temperature": generation_args.get("temperature", 0),
-            "top_p": generation_args.get("top_p", 0.9),
-            "top_k": generation_args.get("top_k", 40),
-            "max_tokens": generation_args.get("max_length", 20000),
-        }
-        return await run_in_threadpool(self._generate_sync, prompt, opts)
+    async def stream(self, prompt: str, **generation_args: Any) -> AsyncIterator[str]:
+        try:
+            events = await self._client.responses.create(
+                model=self.model,
+                instructions=self.instructions,
+                input=prompt,
+                stream=True,
+                **self._options(generation_args),
+            )
+            async for event in events:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+        except Exception as e:
+            raise ProviderError(f"OpenAI - error generating response: {e}") from e
 
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
+    DEFAULT_MODEL = "text-embedding-ada-002"
+
     def __init__(
         self,
         api_key: str | None = None,
-        embedding_model: str = "text-embedding-ada-002",
+        embedding_model: str = DEFAULT_MODEL,
+        client: AsyncOpenAI | None = None,
     ):
         api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not api_key and client is None:
             raise ProviderError("OpenAI API key is missing")
-        self._client = OpenAI(api_key=api_key)
+        self._client = client or AsyncOpenAI(api_key=api_key)
         self._model = embedding_model
 
     async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
         try:
-            response = await run_in_threadpool(
-                self._client.embeddings.create, input=text, model=self._model
+            response = await self._client.embeddings.create(
+                input=texts, model=self._model
             )
-            return response["data"][0]["embedding"]
+            return [
+                item.embedding
+                for item in sorted(response.data, key=lambda item: item.index)
+            ]
         except Exception as e:
             raise ProviderError(f"OpenAI - error generating embedding: {e}") from e
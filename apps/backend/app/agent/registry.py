@@ -0,0 +1,169 @@
+import httpx
+import hashlib
+import logging
+import threading
+import ollama
+
+from openai import AsyncOpenAI
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core import settings
+
+from .providers.ollama import OllamaProvider, OllamaEmbeddingProvider
+from .providers.openai import OpenAIProvider, OpenAIEmbeddingProvider
+from .pool import OllamaHostPool, PooledOllamaProvider, PooledOllamaEmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """
+    Process-wide registry of providers and their HTTP clients.
+
+    Providers are keyed by (backend, model, host) and every provider talking to
+    the same endpoint shares one keep-alive client, so TCP/TLS setup happens once
+    per process rather than once per LLM call. Closed by the app lifespan.
+
+    With `ollama_hosts` configured, Ollama calls are spread over those hosts by
+    `ollama_pool` (see `OllamaHostPool`); `pool_options` are passed to it.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        keepalive_expiry: float,
+        ollama_hosts: Optional[List[str]] = None,
+        **pool_options: Any,
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._providers: Dict[Tuple[str, str, Optional[str]], Any] = {}
+        self._lock = threading.RLock()
+        self.ollama_pool = OllamaHostPool(
+            ollama_hosts or [], client_for=self.ollama_client, **pool_options
+        )
+
+    @staticmethod
+    def _key_digest(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    def _get_or_create(self, pool: Dict, key: Tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            instance = pool.get(key)
+            if instance is None:
+                instance = factory()
+                pool[key] = instance
+            return instance
+
+    def ollama_client(self, host: Optional[str] = None) -> ollama.AsyncClient:
+        return self._get_or_create(
+            self._clients,
+            ("ollama", host),
+            lambda: ollama.AsyncClient(host=host, limits=self._limits),
+        )
+
+    def openai_client(self, api_key: str) -> AsyncOpenAI:
+        return self._get_or_create(
+            self._clients,
+            ("openai", self._key_digest(api_key)),
+            lambda: AsyncOpenAI(
+                api_key=api_key,
+                http_client=httpx.AsyncClient(limits=self._limits),
+            ),
+        )
+
+    def ollama(self, model: str, host: Optional[str] = None) -> OllamaProvider:
+        return self._get_or_create(
+            self._providers,
+            ("ollama", model, host),
+            lambda: OllamaProvider(
+                model_name=model, host=host, client=self.ollama_client(host)
+            ),
+        )
+
+    def ollama_embedding(
+        self, model: str, host: Optional[str] = None
+    ) -> OllamaEmbeddingProvider:
+        return self._get_or_create(
+            self._providers,
+            ("ollama-embedding", model, host),
+            lambda: OllamaEmbeddingProvider(
+                embedding_model=model, host=host, client=self.ollama_client(host)
+            ),
+        )
+
+    def ollama_pooled(self, model: str) -> PooledOllamaProvider:
+        return self._get_or_create(
+            self._providers,
+            ("ollama-pool", model, None),
+            lambda: PooledOllamaProvider(
+                model, self.ollama_pool, lambda host: self.ollama(model, host)
+            ),
+        )
+
+    def ollama_pooled_embedding(self, model: str) -> PooledOllamaEmbeddingProvider:
+        return self._get_or_create(
+            self._providers,
+            ("ollama-pool-embedding", model, None),
+            lambda: PooledOllamaEmbeddingProvider(
+                model,
+                self.ollama_pool,
+                lambda host: self.ollama_embedding(model, host),
+            ),
+        )
+
+    def openai(
+        self, api_key: str, model: str = OpenAIProvider.DEFAULT_MODEL
+    ) -> OpenAIProvider:
+        return self._get_or_create(
+            self._providers,
+            ("openai", model, self._key_digest(api_key)),
+            lambda: OpenAIProvider(model=model, client=self.openai_client(api_key)),
+        )
+
+    def openai_embedding(
+        self, api_key: str, model: str = OpenAIEmbeddingProvider.DEFAULT_MODEL
+    ) -> OpenAIEmbeddingProvider:
+        return self._get_or_create(
+            self._providers,
+            ("openai-embedding", model, self._key_digest(api_key)),
+            lambda: OpenAIEmbeddingProvider(
+                embedding_model=model, client=self.openai_client(api_key)
+            ),
+        )
+
+    async def aclose(self) -> None:
+        """
+        Closes every pooled client. Providers are recreated lazily on next use.
+        """
+        await self.ollama_pool.stop()
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+            self._providers.clear()
+
+        for (backend, _), client in clients:
+            try:
+                if backend == "ollama":
+                    await client._client.aclose()
+                else:
+                    await client.close()
+            except Exception as e:
+                logger.warning(f"error closing {backend} client: {e}")
+
+
+provider_registry = ProviderRegistry(
+    max_connections=settings.LLM_MAX_CONNECTIONS,
+    keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS,
+    ollama_hosts=[
+        host.strip() for host in settings.OLLAMA_HOSTS.split(",") if host.strip()
+    ],
+    health_interval=settings.OLLAMA_HEALTH_INTERVAL_SECONDS,
+    eject_seconds=settings.OLLAMA_EJECT_SECONDS,
+    slow_factor=settings.OLLAMA_SLOW_FACTOR,
+    max_failures=settings.OLLAMA_MAX_FAILURES,
+)
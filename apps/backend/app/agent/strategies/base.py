@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 
 from ..providers.base import Provider
 
@@ -21,3 +21,19 @@ class Strategy(ABC):
             Dict[str, Any]: The generated response and any additional information.
         """
         ...
+
+    async def stream(
+        self, prompt: str, provider: Provider, **generation_args: Any
+    ) -> AsyncIterator[str]:
+        """
+        Yields raw response chunks from the provider as they are generated.
+        Pass the concatenated chunks to `parse` to get the strategy's final output.
+        """
+        async for chunk in provider.stream(prompt, **generation_args):
+            yield chunk
+
+    def parse(self, response: str) -> Any:
+        """
+        Converts a complete raw provider response into the strategy's output.
+        """
+        return response
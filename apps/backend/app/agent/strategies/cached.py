@@ -0,0 +1,89 @@
+import logging
+
+from typing import Any, AsyncIterator, Dict
+
+from .base import Strategy
+from .streaming import notify_section
+from ..cache import ResponseCache, response_key
+from ..providers.base import Provider
+
+logger = logging.getLogger(__name__)
+
+# per-call arguments that select a provider or observe the output, but do not
+# change it
+_UNKEYED_ARGS = {
+    "openai_api_key",
+    "use_cache",
+    "response_model",
+    "on_section",
+    "deadline",
+    "priority",
+}
+
+
+class CachedStrategy(Strategy):
+    """
+    Serves repeated deterministic calls from a `ResponseCache`.
+
+    Only calls at temperature 0 are cached, keyed by the wrapped strategy, the
+    provider and its model, the prompt and the remaining generation options.
+    Pass `use_cache=False` to force a fresh provider call (the result still
+    refreshes the cache). Streaming is never cached.
+    """
+
+    def __init__(self, strategy: Strategy, cache: ResponseCache) -> None:
+        self.strategy = strategy
+        self.cache = cache
+
+    def _key(self, prompt: str, provider: Provider, generation_args: Dict[str, Any]) -> str:
+        # key on the real provider, not an admission-control proxy around it
+        provider = getattr(provider, "inner", provider)
+        return response_key(
+            {
+                "strategy": type(self.strategy).__name__,
+                "provider": type(provider).__name__,
+                "model": getattr(provider, "model", None),
+                "prompt": prompt,
+                "options": {
+                    k: v for k, v in generation_args.items() if k not in _UNKEYED_ARGS
+                },
+            }
+        )
+
+    async def __call__(
+        self, prompt: str, provider: Provider, **generation_args: Any
+    ) -> Any:
+        use_cache = generation_args.pop("use_cache", True)
+        if generation_args.get("temperature", 0) != 0:
+            return await self.strategy(prompt, provider, **generation_args)
+
+        key = self._key(prompt, provider, generation_args)
+        if use_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.debug(f"response cache hit: {key}")
+                await self._replay_sections(cached, generation_args.get("on_section"))
+                return cached
+
+        response = await self.strategy(prompt, provider, **generation_args)
+        await self.cache.set(key, response)
+        return response
+
+    @staticmethod
+    async def _replay_sections(cached: Any, on_section: Any) -> None:
+        # callers relying on `on_section` (see StreamingJSONWrapper) still see
+        # every section of a cached answer
+        if on_section is None or not isinstance(cached, dict):
+            return
+        for key, value in cached.items():
+            await notify_section(on_section, key, value)
+
+    async def stream(
+        self, prompt: str, provider: Provider, **generation_args: Any
+    ) -> AsyncIterator[str]:
+        generation_args.pop("use_cache", None)
+        async for chunk in self.strategy.stream(prompt, provider, **generation_args):
+            yield chunk
+
+    def parse(self, response: str) -> Any:
+        return self.strategy.parse(response)
@@ -0,0 +1,157 @@
+import json
+import inspect
+import logging
+
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, Type
+
+from .wrapper import JSONWrapper
+from ..providers.base import Provider
+from ..exceptions import SchemaViolationError
+
+logger = logging.getLogger(__name__)
+
+SectionCallback = Callable[[str, Any], Optional[Awaitable[None]]]
+
+
+class IncrementalJSONParser:
+    """
+    Consumes a JSON object as text chunks and returns each top-level member as
+    soon as its value is complete, without waiting for the closing brace.
+
+    Text before the opening brace (code fences, chatter) and after the closing
+    one is ignored. Members that do not parse on their own are skipped; the
+    complete response is still parsed (and repaired) by `JSONWrapper.parse`.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        # index right after the `{` or `,` that opened the current member
+        self._member_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._buffer += chunk
+        members: List[Tuple[str, Any]] = []
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+            if self._member_start is None:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(self._pos, members)
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                self._emit(self._pos, members)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return members
+
+    def _emit(self, end: int, members: List[Tuple[str, Any]]) -> None:
+        text = self._buffer[self._member_start : end].strip()
+        if not text:
+            return
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError:
+            logger.debug(f"skipping unparseable streamed member: {text[:80]}")
+            return
+        members.extend(member.items())
+
+
+@lru_cache(maxsize=None)
+def _section_adapter(model: Type[BaseModel], key: str) -> Optional[TypeAdapter]:
+    for name, field in model.model_fields.items():
+        if key in (name, field.alias):
+            return TypeAdapter(field.annotation)
+    return None
+
+
+async def notify_section(
+    on_section: Optional[SectionCallback], key: str, value: Any
+) -> None:
+    """
+    Calls `on_section(key, value)`, awaiting it if async. Callback errors are
+    logged, never raised, so a failing observer cannot abort the generation.
+    """
+    if on_section is None:
+        return
+    try:
+        result = on_section(key, value)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.warning(f"on_section callback failed for '{key}': {e}")
+
+
+class StreamingJSONWrapper(JSONWrapper):
+    """
+    JSONWrapper that streams the provider response through an
+    `IncrementalJSONParser`.
+
+    With `response_model` (a pydantic model) every top-level section is
+    validated against the matching field as soon as it is generated; the first
+    violation stops generation and goes through the repair path of
+    `JSONWrapper` instead of waiting for the rest of an answer that would fail
+    validation anyway. `on_section(key, value)`, sync or async, is called with
+    every completed (and valid) section, e.g. to persist partial results.
+    """
+
+    async def _generate(
+        self,
+        prompt: str,
+        provider: Provider,
+        response_model: Optional[Type[BaseModel]] = None,
+        on_section: Optional[SectionCallback] = None,
+        **generation_args: Any,
+    ) -> str:
+        parser = IncrementalJSONParser()
+        chunks: List[str] = []
+        stream = provider.stream(prompt, **generation_args)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                for key, value in parser.feed(chunk):
+                    self._validate_section(response_model, key, value, chunks)
+                    await notify_section(on_section, key, value)
+        finally:
+            await stream.aclose()
+        return "".join(chunks)
+
+    @staticmethod
+    def _validate_section(
+        response_model: Optional[Type[BaseModel]],
+        key: str,
+        value: Any,
+        chunks: List[str],
+    ) -> None:
+        adapter = _section_adapter(response_model, key) if response_model else None
+        if adapter is None:
+            return
+        try:
+            adapter.validate_python(value)
+        except ValidationError as e:
+            logger.warning(f"aborting generation, section '{key}' is invalid: {e}")
+            raise SchemaViolationError(
+                f"section '{key}' does not match the schema: {e}",
+                response="".join(chunks),
+            ) from e
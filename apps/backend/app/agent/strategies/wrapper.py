@@ -1,6 +1,9 @@
+import re
 import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Set
+
+from app.core import settings
 
 from .base import Strategy
 from ..providers.base import Provider
@@ -9,24 +12,137 @@ from ..exceptions import StrategyError
 
 logger = logging.getLogger(__name__)
 
+_CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?|\n?\s*```\s*$")
+
+_REPAIR_PROMPT = """{prompt}
+
+Your previous answer was not valid ({error}):
+
+{response}
+
+Return the complete corrected JSON only, without any explanation or code fences."""
+
+
+def strip_code_fences(response: str) -> str:
+    """
+    Removes a surrounding ```/```json markdown fence, leaving the content intact.
+    """
+    return _CODE_FENCE.sub("", response.strip()).strip()
+
+
+def repair_json(response: str) -> str:
+    """
+    Best-effort local fix-up of almost-JSON model output: drops text around the
+    outermost object or array, trailing commas, and closes an unterminated
+    string and any brackets left open by a truncated generation.
+    """
+    starts = [i for i in (response.find("{"), response.find("[")) if i != -1]
+    if not starts:
+        return response
+    text = response[min(starts) :]
+
+    closers: List[str] = []
+    in_string = escaped = False
+    end = len(text)
+    # trailing commas to drop, and the last comma outside a string not yet
+    # followed by anything but whitespace
+    dropped: Set[int] = set()
+    comma: Optional[int] = None
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char.isspace():
+            continue
+        if char in "}]" and comma is not None:
+            dropped.add(comma)
+        comma = i if char == "," else None
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if closers:
+                closers.pop()
+            if not closers:
+                end = i + 1
+                break
+
+    text = "".join(char for i, char in enumerate(text[:end]) if i not in dropped)
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(closers))
+
 
 class JSONWrapper(Strategy):
+    """
+    Asks the provider for JSON and parses the answer.
+
+    Pass `json_schema` to have the provider constrain decoding to that schema.
+    Output that still does not parse is first repaired locally and, failing
+    that, sent back to the model with the parse error up to `max_repairs` times.
+    """
+
+    def __init__(self, max_repairs: int | None = None) -> None:
+        self.max_repairs = (
+            max_repairs
+            if max_repairs is not None
+            else settings.JSON_REPAIR_RETRIES
+        )
+
     async def __call__(
         self, prompt: str, provider: Provider, **generation_args: Any
     ) -> Dict[str, Any]:
         """
         Wrapper strategy to format the prompt as JSON with the help of LLM.
         """
-        response = await provider(prompt, **generation_args)
-        response = response.replace("```", "").replace("json", "").strip()
+        request, response = prompt, ""
+        for attempt in range(self.max_repairs + 1):
+            try:
+                response = await self._generate(request, provider, **generation_args)
+                return self.parse(response)
+            except StrategyError as e:
+                if attempt == self.max_repairs:
+                    raise
+                # an aborted stream carries the partial response it rejected
+                response = getattr(e, "response", response)
+                logger.warning(
+                    f"asking provider to repair its JSON (attempt {attempt + 1}/{self.max_repairs}): {e}"
+                )
+                request = _REPAIR_PROMPT.format(
+                    prompt=prompt, error=e, response=strip_code_fences(response)
+                )
+
+    async def _generate(
+        self, prompt: str, provider: Provider, **generation_args: Any
+    ) -> str:
+        return await provider(prompt, **generation_args)
+
+    def parse(self, response: str) -> Dict[str, Any]:
+        response = strip_code_fences(response)
         logger.info(f"provider response: {response}")
         try:
             return json.loads(response)
         except json.JSONDecodeError as e:
+            error = e
+
+        try:
+            repaired = json.loads(repair_json(response))
+        except json.JSONDecodeError:
             logger.error(
-                f"provider returned non-JSON. parsing error: {e} - response: {response}"
+                f"provider returned non-JSON. parsing error: {error} - response: {response}"
             )
-            raise StrategyError(f"JSON parsing error: {e}") from e
+            raise StrategyError(f"JSON parsing error: {error}") from error
+        logger.warning(f"repaired malformed provider JSON: {error}")
+        return repaired
 
 
 class MDWrapper(Strategy):
@@ -38,6 +154,9 @@ class MDWrapper(Strategy):
         """
         logger.info(f"prompt given to provider: \n{prompt}")
         response = await provider(prompt, **generation_args)
+        return self.parse(response)
+
+    def parse(self, response: str) -> str:
         logger.info(f"provider response: {response}")
         try:
             response = (
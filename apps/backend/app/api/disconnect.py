@@ -0,0 +1,42 @@
+import asyncio
+import logging
+
+from starlette.requests import ClientDisconnect, Request
+from typing import Awaitable, TypeVar
+
+from app.core import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _watch_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(settings.DISCONNECT_POLL_SECONDS)
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Awaits `awaitable`, cancelling it as soon as the client disconnects so an
+    abandoned request stops consuming model capacity (the cancellation reaches
+    the in-flight provider calls and closes their connections).
+
+    Raises:
+        ClientDisconnect: If the client went away first.
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.create_task(_watch_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (work, watcher):
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(work, watcher, return_exceptions=True)
+
+    if not work.cancelled():
+        return work.result()
+    logger.info(f"Client disconnected, cancelled {request.url.path}")
+    raise ClientDisconnect()
+
@@ -7,7 +7,7 @@ from fastapi import APIRouter, HTTPException, Depends, Request, status, Query
 from fastapi.responses import JSONResponse
 
 from app.core import get_db_session
-from app.services import JobService, JobNotFoundError
+from app.services import JobService, IngestionService, JobNotFoundError
 from app.schemas.pydantic.job import JobUploadRequest
 
 job_router = APIRouter()
@@ -22,9 +22,15 @@ async def upload_job(
     payload: JobUploadRequest,
     request: Request,
     db: AsyncSession = Depends(get_db_session),
+    background: bool = Query(
+        False,
+        description="Queue the job descriptions for processing and return a task_id immediately",
+    ),
 ):
     """
     Accepts a job description as a MarkDown text and stores it in the database.
+    With `background=true` the descriptions are queued instead and their progress
+    is reported by `GET /api/v1/tasks/{task_id}`.
     """
     request_id = getattr(request.state, "request_id", str(uuid4()))
 
@@ -45,6 +51,22 @@ async def upload_job(
             detail=f"Invalid Content-Type. Only {', '.join(allowed_content_types)} is/are allowed.",
         )
 
+    if background:
+        ingestion_service = IngestionService(db)
+        task_id = await ingestion_service.enqueue_jobs(payload.model_dump(mode="json"))
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": "data queued for processing",
+                "task_id": task_id,
+                "status": "pending",
+                "request": {
+                    "request_id": request_id,
+                    "payload": payload.model_dump(mode="json"),
+                },
+            },
+        )
+
     try:
         job_service = JobService(db)
         job_ids = await job_service.create_and_store_job(payload.model_dump())
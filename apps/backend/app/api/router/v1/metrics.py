@@ -0,0 +1,45 @@
+from uuid import uuid4
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.agent import admission_controller, provider_registry
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get(
+    "/llm",
+    summary="Concurrency and queue depth of LLM generations per model",
+)
+async def llm_metrics(request: Request):
+    """
+    Reports, per `backend:model`, the concurrency limit, generations in flight,
+    queued generations by priority and how long admitted calls waited.
+    """
+    request_id = getattr(request.state, "request_id", str(uuid4()))
+    return JSONResponse(
+        content={
+            "request_id": request_id,
+            "data": admission_controller.metrics(),
+        },
+        headers={"X-Request-ID": request_id},
+    )
+
+
+@metrics_router.get(
+    "/ollama",
+    summary="Routing state of the configured Ollama hosts",
+)
+async def ollama_metrics(request: Request):
+    """
+    Reports, per host in `OLLAMA_HOSTS`, its health, ejection, outstanding
+    requests, latency and error counts. Empty without a host pool.
+    """
+    request_id = getattr(request.state, "request_id", str(uuid4()))
+    return JSONResponse(
+        content={
+            "request_id": request_id,
+            "data": provider_registry.ollama_pool.metrics(),
+        },
+        headers={"X-Request-ID": request_id},
+    )
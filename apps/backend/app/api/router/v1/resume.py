@@ -3,7 +3,8 @@ import traceback
 
 from uuid import uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
 from fastapi import (
     APIRouter,
     File,
@@ -15,9 +16,12 @@ from fastapi import (
     Query,
 )
 
-from app.core import get_db_session
+from app.core import get_db_session, settings
+from app.agent import deadline_after
 from app.services import (
     ResumeService,
+    IngestionService,
+    JobMatchService,
     ScoreImprovementService,
     ResumeNotFoundError,
     ResumeParsingError,
@@ -27,7 +31,8 @@ from app.services import (
     ResumeKeywordExtractionError,
     JobKeywordExtractionError,
 )
-from app.schemas.pydantic import ResumeImprovementRequest
+from app.schemas.pydantic import ResumeImprovementRequest, BulkScoreRequest
+from app.api.disconnect import cancel_on_disconnect
 
 resume_router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -41,9 +46,15 @@ async def upload_resume(
     request: Request,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db_session),
+    background: bool = Query(
+        False,
+        description="Queue the resume for processing and return a task_id immediately",
+    ),
 ):
     """
     Accepts a PDF or DOCX file, converts it to HTML/Markdown, and stores it in the database.
+    With `background=true` the file is queued instead and its progress is
+    reported by `GET /api/v1/tasks/{task_id}`.
 
     Raises:
         HTTPException: If the file type is not supported or if the file is empty.
@@ -68,6 +79,24 @@ async def upload_resume(
             detail="Empty file. Please upload a valid file.",
         )
 
+    if background:
+        ingestion_service = IngestionService(db)
+        task_id = await ingestion_service.enqueue_resume(
+            file_bytes=file_bytes,
+            file_type=file.content_type,
+            filename=file.filename,
+            content_type="md",
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "message": f"File {file.filename} queued for processing",
+                "request_id": request_id,
+                "task_id": task_id,
+                "status": "pending",
+            },
+        )
+
     try:
         resume_service = ResumeService(db)
         resume_id = await resume_service.convert_and_store_resume(
@@ -132,8 +161,14 @@ async def score_and_improve(
             raise JobNotFoundError(
                 message="invalid value passed in `job_id` field, please try again with valid job_id."
             )
-        score_improvement_service = ScoreImprovementService(db=db)
+        score_improvement_service = ScoreImprovementService(
+            db=db,
+            options=payload.options,
+            deadline=deadline_after(settings.IMPROVE_TIMEOUT_SECONDS),
+        )
 
+        # generation is cancelled as soon as the client goes away; for the
+        # stream StreamingResponse's own disconnect listener does that
         if stream:
             return StreamingResponse(
                 content=score_improvement_service.run_and_stream(
@@ -144,9 +179,12 @@ async def score_and_improve(
                 headers=headers,
             )
         else:
-            improvements = await score_improvement_service.run(
-                resume_id=resume_id,
-                job_id=job_id,
+            improvements = await cancel_on_disconnect(
+                request,
+                score_improvement_service.run(
+                    resume_id=resume_id,
+                    job_id=job_id,
+                ),
             )
             return JSONResponse(
                 content={
@@ -155,6 +193,9 @@ async def score_and_improve(
                 },
                 headers=headers,
             )
+    except ClientDisconnect:
+        # nobody is left to read a response; 499 is nginx's "client closed request"
+        return Response(status_code=499, headers=headers)
     except ResumeNotFoundError as e:
         logger.error(str(e))
         raise HTTPException(
@@ -199,6 +240,64 @@ async def score_and_improve(
         )
 
 
+@resume_router.post(
+    "/score",
+    summary="Score many resumes against many jobs in one request",
+)
+async def bulk_score(
+    request: Request,
+    payload: BulkScoreRequest,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Returns the cosine similarity of every resume against every job as a matrix
+    with one row per resume and one column per job. No LLM improvement is run.
+
+    Raises:
+        HTTPException: If any resume or job is not found or was not parsed.
+    """
+    request_id = getattr(request.state, "request_id", str(uuid4()))
+    headers = {"X-Request-ID": request_id}
+
+    try:
+        score_improvement_service = ScoreImprovementService(db=db)
+        scores = await score_improvement_service.score_many(
+            resume_ids=[str(resume_id) for resume_id in payload.resume_ids],
+            job_ids=[str(job_id) for job_id in payload.job_ids],
+        )
+        return JSONResponse(
+            content={
+                "request_id": request_id,
+                "data": scores,
+            },
+            headers=headers,
+        )
+    except (ResumeNotFoundError, JobNotFoundError) as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except (ResumeParsingError, JobParsingError) as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        )
+    except JobKeywordExtractionError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error(f"Error: {str(e)} - traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="sorry, something went wrong!",
+        )
+
+
 @resume_router.get(
     "",
     summary="Get resume data from both resume and processed_resume models",
@@ -259,4 +358,56 @@ async def get_resume(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching resume data",
-        )
\ No newline at end of file
+        )
+
+
+@resume_router.get(
+    "/{resume_id}/matches",
+    summary="Rank the stored jobs that best match a resume",
+)
+async def match_jobs(
+    request: Request,
+    resume_id: str,
+    k: int = Query(10, ge=1, le=100, description="Number of jobs to return"),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Returns the top-k stored jobs ranked by cosine similarity between the resume
+    embedding and each job's keyword embedding.
+
+    Raises:
+        HTTPException: If the resume is not found or if there's an error ranking jobs.
+    """
+    request_id = getattr(request.state, "request_id", str(uuid4()))
+    headers = {"X-Request-ID": request_id}
+
+    try:
+        job_match_service = JobMatchService(db)
+        matches = await job_match_service.top_k(resume_id=resume_id, k=k)
+
+        return JSONResponse(
+            content={
+                "request_id": request_id,
+                "data": matches,
+            },
+            headers=headers,
+        )
+
+    except ResumeNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except ResumeParsingError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error(f"Error matching jobs: {str(e)} - traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error matching jobs for resume",
+        )
@@ -0,0 +1,59 @@
+import logging
+import traceback
+
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import JSONResponse
+
+from app.core import get_db_session
+from app.services import IngestionService, TaskNotFoundError
+
+task_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@task_router.get(
+    "/{task_id}",
+    summary="Get the status of a background resume or job ingestion task",
+)
+async def get_task(
+    request: Request,
+    task_id: str,
+    db: AsyncSession = Depends(get_db_session),
+):
+    """
+    Reports the progress of an upload submitted with `background=true`. Once the
+    status is `completed` the result holds the `resume_id` or `job_id` list; a
+    `failed` task carries the error message instead.
+
+    Raises:
+        HTTPException: If the task is not found or if there's an error fetching it.
+    """
+    request_id = getattr(request.state, "request_id", str(uuid4()))
+    headers = {"X-Request-ID": request_id}
+
+    try:
+        ingestion_service = IngestionService(db)
+        task = await ingestion_service.get_task(task_id=task_id)
+
+        return JSONResponse(
+            content={
+                "request_id": request_id,
+                "data": task,
+            },
+            headers=headers,
+        )
+
+    except TaskNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error(f"Error fetching task: {str(e)} - traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error fetching task status",
+        )
@@ -12,18 +12,27 @@ from .core import (
     settings,
     async_engine,
     setup_logging,
+    sync_missing_columns,
     custom_http_exception_handler,
     validation_exception_handler,
     unhandled_exception_handler,
 )
 from .models import Base
+from .agent import provider_registry
+from .services import ingestion_workers, document_converter
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(sync_missing_columns, Base)
+    provider_registry.ollama_pool.start()
+    await ingestion_workers.start()
     yield
+    await ingestion_workers.stop()
+    document_converter.shutdown()
+    await provider_registry.aclose()
     await async_engine.dispose()
 
 
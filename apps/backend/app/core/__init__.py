@@ -1,4 +1,11 @@
-from .database import init_models, async_engine, get_db_session, get_sync_db_session
+from .database import (
+    init_models,
+    async_engine,
+    AsyncSessionLocal,
+    get_db_session,
+    get_sync_db_session,
+    sync_missing_columns,
+)
 from .config import settings, setup_logging
 from .exceptions import (
     custom_http_exception_handler,
@@ -11,9 +18,11 @@ __all__ = [
     "settings",
     "init_models",
     "async_engine",
+    "AsyncSessionLocal",
     "setup_logging",
     "get_db_session",
     "get_sync_db_session",
+    "sync_missing_columns",
     "custom_http_exception_handler",
     "validation_exception_handler",
     "unhandled_exception_handler",
@@ -4,6 +4,8 @@ import logging
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Optional, Literal
 
+_BACKEND_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)
+
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Resume Matcher"
@@ -14,9 +16,43 @@ class Settings(BaseSettings):
     SESSION_SECRET_KEY: Optional[str]
     DB_ECHO: bool = False
     PYTHONDONTWRITEBYTECODE: int = 1
+    EMBEDDING_CACHE_PATH: str = os.path.join(_BACKEND_DIR, ".cache", "embeddings.sqlite3")
+    EMBEDDING_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EMBEDDING_BATCH_WINDOW_MS: float = 5
+    EMBEDDING_MAX_BATCH_SIZE: int = 64
+    LLM_CACHE_PATH: str = os.path.join(_BACKEND_DIR, ".cache", "responses.sqlite3")
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_MAX_CONTEXT: int = 20000
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_SECONDS: float = 60
+    LLM_MAX_CONCURRENCY: int = 2
+    LLM_MODEL_CONCURRENCY: str = ""
+    JSON_REPAIR_RETRIES: int = 1
+    OLLAMA_MODELS_TTL_SECONDS: float = 60
+    OLLAMA_HOSTS: str = ""
+    OLLAMA_HEALTH_INTERVAL_SECONDS: float = 10
+    OLLAMA_EJECT_SECONDS: float = 30
+    OLLAMA_SLOW_FACTOR: float = 3
+    OLLAMA_MAX_FAILURES: int = 3
+    IMPROVE_CANDIDATES: int = 1
+    IMPROVE_MAX_CONCURRENCY: int = 4
+    IMPROVE_EMBEDDING_MODE: Literal["document", "sections"] = "document"
+    IMPROVE_EMBEDDING_CHUNK_TOKENS: int = 512
+    IMPROVE_TIMEOUT_SECONDS: Optional[float] = None
+    DISCONNECT_POLL_SECONDS: float = 0.5
+    JOB_EXTRACTION_CONCURRENCY: int = 4
+    RESUME_SECTION_MIN_TOKENS: int = 1500
+    RESUME_SECTION_CONCURRENCY: int = 4
+    INGESTION_WORKERS: int = 2
+    CONVERSION_WORKERS: int = 2
+    CONVERSION_TIMEOUT_SECONDS: float = 60.0
+    CONVERSION_SPOOL_MAX_BYTES: int = 10 * 1024 * 1024
+    INGESTION_POLL_SECONDS: float = 2.0
+    INGESTION_LEASE_SECONDS: float = 60.0
+    INGESTION_MAX_ATTEMPTS: int = 3
 
     model_config = SettingsConfigDict(
-        env_file=os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, ".env"),
+        env_file=os.path.join(_BACKEND_DIR, ".env"),
         env_file_encoding="utf-8",
     )
 
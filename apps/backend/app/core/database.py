@@ -3,8 +3,8 @@ from __future__ import annotations
 from functools import lru_cache
 from typing import AsyncGenerator, Generator, Optional
 
-from sqlalchemy import event, create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy import event, create_engine, inspect, text
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -127,6 +127,43 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+def sync_missing_columns(conn: Connection, Base: Base = Base) -> None:
+    """
+    Additive schema sync for databases created by an older version of the models.
+
+    ``create_all`` never alters existing tables, so nullable columns added to a
+    model later are appended here with ``ALTER TABLE ... ADD COLUMN``, and any
+    index the model declares that the table lacks is created afterwards. An index
+    whose uniqueness changed in the model is dropped and recreated.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(
+                text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                )
+            )
+
+        existing_indexes = {
+            index["name"]: bool(index["unique"])
+            for index in inspector.get_indexes(table.name)
+        }
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+            elif existing_indexes[index.name] != bool(index.unique):
+                index.drop(conn)
+                index.create(conn)
+
+
 async def init_models(Base: Base) -> None:
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(sync_missing_columns, Base)
@@ -2,6 +2,7 @@ from .base import Base
 from .resume import ProcessedResume, Resume
 from .user import User
 from .job import ProcessedJob, Job
+from .task import IngestionTask
 from .association import job_resume_association
 
 __all__ = [
@@ -11,5 +12,6 @@ __all__ = [
     "ProcessedJob",
     "User",
     "Job",
+    "IngestionTask",
     "job_resume_association",
 ]
@@ -1,6 +1,16 @@
 from sqlalchemy.types import JSON
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime, text
+from sqlalchemy import (
+    Column,
+    String,
+    Text,
+    Integer,
+    ForeignKey,
+    DateTime,
+    LargeBinary,
+    Index,
+    text,
+)
 
 from .base import Base
 from .association import job_resume_association
@@ -26,6 +36,10 @@ class ProcessedJob(Base):
     compensation_and_benfits = Column(JSON, nullable=True)
     application_info = Column(JSON, nullable=True)
     extracted_keywords = Column(JSON, nullable=True)
+    # float32 vector blob, see `app.agent.pack_embedding`
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_model = Column(String, nullable=True)
+    embedding_dim = Column(Integer, nullable=True)
     processed_at = Column(
         DateTime(timezone=True),
         server_default=text("CURRENT_TIMESTAMP"),
@@ -53,6 +67,9 @@ class Job(Base):
     job_id = Column(String, unique=True, nullable=False)
     resume_id = Column(String, ForeignKey("resumes.resume_id"), nullable=False)
     content = Column(Text, nullable=False)
+    # sha256 of the whitespace-normalized description, used to deduplicate
+    # re-uploads of a description for the same resume
+    content_hash = Column(String, nullable=True, index=True)
     created_at = Column(
         DateTime(timezone=True),
         server_default=text("CURRENT_TIMESTAMP"),
@@ -65,3 +82,12 @@ class Job(Base):
     )
 
     resumes = relationship("Resume", back_populates="jobs")
+
+    __table_args__ = (
+        Index(
+            "ix_jobs_resume_id_content_hash",
+            "resume_id",
+            "content_hash",
+            unique=True,
+        ),
+    )
@@ -1,6 +1,15 @@
 from sqlalchemy.types import JSON
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, text
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    ForeignKey,
+    Text,
+    DateTime,
+    LargeBinary,
+    text,
+)
 
 from .base import Base
 from .association import job_resume_association
@@ -23,6 +32,10 @@ class ProcessedResume(Base):
     achievements = Column(JSON, nullable=True)
     education = Column(JSON, nullable=True)
     extracted_keywords = Column(JSON, nullable=True)
+    # float32 vector blob, see `app.agent.pack_embedding`
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_model = Column(String, nullable=True)
+    embedding_dim = Column(Integer, nullable=True)
     processed_at = Column(
         DateTime(timezone=True),
         server_default=text("CURRENT_TIMESTAMP"),
@@ -48,6 +61,8 @@ class Resume(Base):
     resume_id = Column(String, unique=True, nullable=False)
     content = Column(Text, nullable=False)
     content_type = Column(String, nullable=False)
+    # sha256 of the uploaded file bytes, used to deduplicate re-uploads
+    content_hash = Column(String, nullable=True, unique=True, index=True)
     created_at = Column(
         DateTime(timezone=True),
         server_default=text("CURRENT_TIMESTAMP"),
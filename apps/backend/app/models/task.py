@@ -0,0 +1,41 @@
+from sqlalchemy.types import JSON
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Text,
+    DateTime,
+    LargeBinary,
+    text,
+)
+
+from .base import Base
+
+
+class IngestionTask(Base):
+    __tablename__ = "ingestion_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(String, unique=True, nullable=False, index=True)
+    # "resume" or "job"
+    kind = Column(String, nullable=False)
+    # pending -> processing -> completed | failed
+    status = Column(String, nullable=False, default="pending", index=True)
+    # raw upload bytes, cleared once the task has finished
+    payload = Column(LargeBinary, nullable=True)
+    params = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+        index=True,
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # worker pool holding the task while it is processing, and its last
+    # heartbeat; a lease older than INGESTION_LEASE_SECONDS may be reclaimed
+    owner = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
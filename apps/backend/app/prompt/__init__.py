@@ -1,4 +1,22 @@
 from .base import PromptFactory
+from .budget import (
+    StructuredPrompt,
+    estimate_tokens,
+    compact_json,
+    context_window,
+    split_into_chunks,
+    build_structured_prompts,
+    merge_extractions,
+)
 
 prompt_factory = PromptFactory()
-__all__ = ["prompt_factory"]
+__all__ = [
+    "prompt_factory",
+    "StructuredPrompt",
+    "estimate_tokens",
+    "compact_json",
+    "context_window",
+    "split_into_chunks",
+    "build_structured_prompts",
+    "merge_extractions",
+]
@@ -0,0 +1,162 @@
+import json
+import math
+import logging
+
+from typing import Any, Dict, List, NamedTuple
+
+from app.core import settings
+from app.schemas.json import to_json_schema
+
+logger = logging.getLogger(__name__)
+
+# conservative average for English prose, markdown and JSON across the local
+# models we run; over-estimating only costs a slightly larger context window
+CHARS_PER_TOKEN = 3.5
+
+# Ollama reloads the model whenever `num_ctx` changes, so context windows are
+# rounded up to a few fixed sizes instead of tracking every prompt exactly
+CONTEXT_STEP = 4096
+MAX_CONTEXT = settings.LLM_MAX_CONTEXT
+
+
+class StructuredPrompt(NamedTuple):
+    prompt: str
+    # context window for the call, passed to the provider as `max_length`
+    max_length: int
+    # the schema as JSON Schema, passed to the provider to constrain decoding
+    json_schema: Dict[str, Any]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, tokenizer-free estimate of the number of tokens in `text`.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_json(data: Any) -> str:
+    """
+    Serializes a schema without the whitespace `indent=2` spends tokens on.
+    """
+    return json.dumps(data, separators=(",", ":"))
+
+
+def context_window(tokens: int, max_context: int = MAX_CONTEXT) -> int:
+    """
+    Smallest `CONTEXT_STEP` multiple that fits `tokens`, capped at `max_context`.
+    """
+    rounded = max(CONTEXT_STEP, math.ceil(tokens / CONTEXT_STEP) * CONTEXT_STEP)
+    return min(rounded, max_context)
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits `text` into chunks of at most `max_tokens`, breaking at paragraph
+    boundaries and falling back to line, then character, boundaries for
+    paragraphs that are too long on their own.
+    """
+    max_chars = max(1, int(max_tokens * CHARS_PER_TOKEN))
+    pieces: List[str] = []
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            pieces.extend(
+                line[i : i + max_chars] for i in range(0, max(len(line), 1), max_chars)
+            )
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_structured_prompts(
+    template: str, schema: Any, document: str, max_context: int = MAX_CONTEXT
+) -> List[StructuredPrompt]:
+    """
+    Formats a `{0}` schema / `{1}` document extraction template with a compact
+    schema and a context window sized to the prompt plus the expected answer,
+    which restates the document in schema form. The answer is budgeted at the
+    document's size but at most a quarter of `max_context`, since the schema
+    form is far terser than the prose it summarises.
+
+    A document too long for `max_context` is split at chunk boundaries into
+    several prompts, one per chunk; callers extract each and merge the
+    answers, so nothing is dropped.
+
+    Raises:
+        ValueError: If the template and schema alone leave no room for a document.
+    """
+    schema_text = compact_json(schema)
+    overhead = estimate_tokens(template.format(schema_text, ""))
+    schema_tokens = estimate_tokens(schema_text)
+    answer_cap = max_context // 4
+    json_schema = to_json_schema(schema)
+
+    def needed(document_tokens: int) -> int:
+        answer_tokens = min(document_tokens, answer_cap)
+        return overhead + schema_tokens + document_tokens + answer_tokens
+
+    def prompt(chunk: str) -> StructuredPrompt:
+        return StructuredPrompt(
+            prompt=template.format(schema_text, chunk),
+            max_length=context_window(needed(estimate_tokens(chunk)), max_context),
+            json_schema=json_schema,
+        )
+
+    document_tokens = estimate_tokens(document)
+    if needed(document_tokens) <= max_context:
+        return [prompt(document)]
+
+    budget = max_context - overhead - schema_tokens - answer_cap
+    if budget < 1:
+        raise ValueError(
+            f"Extraction prompt of ~{overhead + schema_tokens} tokens leaves no room "
+            f"for a document in a {max_context} token context."
+        )
+    chunks = split_into_chunks(document, budget)
+    logger.info(
+        f"Document of ~{document_tokens} tokens exceeds the {max_context} token "
+        f"context, extracting it in {len(chunks)} chunks."
+    )
+    return [prompt(chunk) for chunk in chunks]
+
+
+def merge_extractions(outputs: List[Any]) -> Any:
+    """
+    Merges the answers extracted from consecutive chunks of one document:
+    objects are merged key by key, lists concatenated without duplicates, and
+    for anything else the first non-empty value wins.
+
+    >>> merge_extractions([{"a": "x", "b": [1]}, {"a": "", "b": [1, 2], "c": None}])
+    {'a': 'x', 'b': [1, 2], 'c': None}
+    """
+    values = [value for value in outputs if value not in (None, "", [], {})]
+    if not values:
+        return outputs[0] if outputs else None
+    if all(isinstance(value, dict) for value in values):
+        keys = dict.fromkeys(key for value in values for key in value)
+        return {
+            key: merge_extractions([value[key] for value in values if key in value])
+            for key in keys
+        }
+    if all(isinstance(value, list) for value in values):
+        merged, seen = [], set()
+        for item in (item for value in values for item in value):
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if marker not in seen:
+                seen.add(marker)
+                merged.append(item)
+        return merged
+    return values[0]
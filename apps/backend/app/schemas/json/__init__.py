@@ -1,4 +1,4 @@
-from .base import JSONSchemaFactory
+from .base import JSONSchemaFactory, to_json_schema
 
 json_schema_factory = JSONSchemaFactory()
-__all__ = ["json_schema_factory"]
+__all__ = ["json_schema_factory", "to_json_schema"]
@@ -1,10 +1,46 @@
 import pkgutil
 import importlib
-from typing import Dict
+from typing import Any, Dict
 
 from app.schemas.json import __path__ as schema_pkg_path
 
 
+def _is_nullable(placeholder: str) -> bool:
+    return "null" in placeholder or placeholder.startswith("Optional[")
+
+
+def to_json_schema(example: Any) -> Dict[str, Any]:
+    """
+    Converts one of our example-shaped schemas (`{"name": "string", ...}`) into a
+    JSON Schema that providers can enforce while decoding.
+
+    Placeholders mentioning `null` or `Optional[...]` become nullable strings,
+    the `"..."` continuation marker in lists is dropped and every key is
+    required, mirroring what the prompts ask for.
+    """
+    if isinstance(example, dict):
+        return {
+            "type": "object",
+            "properties": {key: to_json_schema(value) for key, value in example.items()},
+            "required": list(example),
+        }
+    if isinstance(example, list):
+        items = [item for item in example if item != "..."]
+        return {
+            "type": "array",
+            "items": to_json_schema(items[0]) if items else {},
+        }
+    if isinstance(example, bool):
+        return {"type": "boolean"}
+    if isinstance(example, int):
+        return {"type": "integer"}
+    if isinstance(example, float):
+        return {"type": "number"}
+    if isinstance(example, str) and _is_nullable(example):
+        return {"type": ["string", "null"]}
+    return {"type": "string"}
+
+
 class JSONSchemaFactory:
     def __init__(self) -> None:
         self._schema: Dict[str, str] = {}
@@ -29,3 +65,9 @@ class JSONSchemaFactory:
             raise KeyError(
                 f"SCHEMA '{name}' not found. Available schemas: {list(self._schema.keys())}"
             )
+
+    def get_json_schema(self, name: str) -> Dict[str, Any]:
+        """
+        Returns the named schema converted to JSON Schema, see `to_json_schema`.
+        """
+        return to_json_schema(self.get(name))
@@ -1,13 +1,16 @@
 from .job import JobUploadRequest
+from .bulk_score import BulkScoreRequest
 from .structured_job import StructuredJobModel
 from .resume_preview import ResumePreviewerModel
 from .structured_resume import StructuredResumeModel
-from .resume_improvement import ResumeImprovementRequest
+from .resume_improvement import ImprovementOptions, ResumeImprovementRequest
 
 __all__ = [
     "JobUploadRequest",
+    "BulkScoreRequest",
     "ResumePreviewerModel",
     "StructuredResumeModel",
     "StructuredJobModel",
     "ResumeImprovementRequest",
+    "ImprovementOptions",
 ]
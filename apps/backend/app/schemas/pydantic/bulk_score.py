@@ -0,0 +1,24 @@
+from uuid import UUID
+from typing import List
+from pydantic import BaseModel, Field
+
+
+# bounds the score matrix and keeps each `IN (...)` lookup well below SQLite's
+# bound parameter limit
+MAX_BULK_RESUMES = 100
+MAX_BULK_JOBS = 500
+
+
+class BulkScoreRequest(BaseModel):
+    resume_ids: List[UUID] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BULK_RESUMES,
+        description=f"DB UUID references to the resumes (at most {MAX_BULK_RESUMES})",
+    )
+    job_ids: List[UUID] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BULK_JOBS,
+        description=f"DB UUID references to the jobs (at most {MAX_BULK_JOBS})",
+    )
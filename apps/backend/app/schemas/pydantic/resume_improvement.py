@@ -1,7 +1,34 @@
 from uuid import UUID
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
+class ImprovementOptions(BaseModel):
+    target_score: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Keep refining until the score reaches this value (stops early if the resume already does)",
+    )
+    min_delta: float = Field(
+        0.0,
+        ge=0.0,
+        description="Minimum gain over the original score before an improvement is accepted as final",
+    )
+    deadline_seconds: Optional[float] = Field(
+        None, gt=0, description="No new attempt is started after this many seconds"
+    )
+    max_tokens: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Estimated prompt + completion token budget across all attempts",
+    )
+
+
 class ResumeImprovementRequest(BaseModel):
     job_id: UUID = Field(..., description="DB UUID reference to the job")
     resume_id: UUID = Field(..., description="DB UUID reference to the resume")
+    options: ImprovementOptions = Field(
+        default_factory=ImprovementOptions,
+        description="Stopping policy for the improvement loop",
+    )
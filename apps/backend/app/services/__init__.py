@@ -1,5 +1,8 @@
 from .job_service import JobService
+from .job_match_service import JobMatchService
 from .resume_service import ResumeService
+from .ingestion_service import IngestionService, ingestion_workers
+from .conversion import document_converter
 from .score_improvement_service import ScoreImprovementService
 from .exceptions import (
     ResumeNotFoundError,
@@ -9,11 +12,17 @@ from .exceptions import (
     JobParsingError,
     ResumeKeywordExtractionError,
     JobKeywordExtractionError,
+    TaskNotFoundError,
+    ResumeConversionError,
 )
 
 __all__ = [
     "JobService",
+    "JobMatchService",
     "ResumeService",
+    "IngestionService",
+    "ingestion_workers",
+    "document_converter",
     "JobParsingError",
     "JobNotFoundError",
     "ResumeParsingError",
@@ -21,5 +30,7 @@ __all__ = [
     "ResumeValidationError",
     "ResumeKeywordExtractionError",
     "JobKeywordExtractionError",
+    "TaskNotFoundError",
+    "ResumeConversionError",
     "ScoreImprovementService",
 ]
@@ -0,0 +1,147 @@
+import io
+import os
+import asyncio
+import logging
+import tempfile
+import threading
+import multiprocessing
+
+from markitdown import MarkItDown, StreamInfo
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core import settings
+from .exceptions import ResumeConversionError
+
+logger = logging.getLogger(__name__)
+
+# one MarkItDown instance per worker process, created by `_init_worker`
+_markitdown: MarkItDown | None = None
+
+
+def _init_worker() -> None:
+    global _markitdown
+    _markitdown = MarkItDown(enable_plugins=False)
+
+
+def _convert(source: bytes | str, extension: str) -> str:
+    """
+    Runs inside a pool worker: converts a PDF/DOCX upload to markdown text.
+
+    `source` is either the upload itself or the path of the temporary file the
+    parent spooled it to.
+    """
+    if isinstance(source, str):
+        stream = open(source, "rb")
+    else:
+        stream = io.BytesIO(source)
+
+    try:
+        with stream:
+            return _markitdown.convert_stream(
+                stream, stream_info=StreamInfo(extension=extension or None)
+            ).text_content
+    except Exception as e:
+        # MarkItDown errors hold tracebacks, which cannot be pickled back to the
+        # parent process
+        raise ResumeConversionError(message=f"{type(e).__name__}: {e}") from None
+
+
+class DocumentConverter:
+    """
+    Converts uploads with MarkItDown in a dedicated process pool so PDF parsing
+    never blocks the event loop.
+
+    Uploads larger than `spool_max_bytes` are written to a temporary file by
+    the parent and handed to the worker by path, so they are never pickled
+    across the process boundary.
+
+    The pool is created on first use. A conversion that exceeds `timeout` gets
+    its pool torn down (workers terminated) and replaced, since a running
+    process-pool job cannot be cancelled on its own; conversions sharing that
+    pool fail with `ResumeConversionError` as well.
+    """
+
+    def __init__(self, workers: int, timeout: float, spool_max_bytes: int) -> None:
+        self._workers = max(1, workers)
+        self._timeout = timeout
+        self._spool_max_bytes = spool_max_bytes
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    # forking a process that already runs threads (aiosqlite,
+                    # httpx) is unsafe, so workers start from a clean interpreter
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _spool(file_bytes: bytes, extension: str) -> str:
+        with tempfile.NamedTemporaryFile(
+            suffix=f".{extension}" if extension else "", delete=False
+        ) as spool:
+            spool.write(file_bytes)
+        return spool.name
+
+    async def convert(self, file_bytes: bytes, extension: str) -> str:
+        """
+        Returns the markdown text of a PDF/DOCX upload.
+
+        Raises:
+            ResumeConversionError: If conversion times out or the worker crashes.
+        """
+        if len(file_bytes) <= self._spool_max_bytes:
+            return await self._run(file_bytes, extension)
+
+        path = await asyncio.to_thread(self._spool, file_bytes, extension)
+        try:
+            return await self._run(path, extension)
+        finally:
+            os.unlink(path)
+
+    async def _run(self, source: bytes | str, extension: str) -> str:
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, _convert, source, extension),
+                timeout=self._timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                f"Document conversion timed out after {self._timeout}s, restarting pool."
+            )
+            self._discard_executor(executor)
+            raise ResumeConversionError(
+                message=f"Document conversion timed out after {self._timeout} seconds."
+            )
+        except BrokenProcessPool as e:
+            self._discard_executor(executor)
+            raise ResumeConversionError(message=f"Document conversion failed: {e}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+document_converter = DocumentConverter(
+    workers=settings.CONVERSION_WORKERS,
+    timeout=settings.CONVERSION_TIMEOUT_SECONDS,
+    spool_max_bytes=settings.CONVERSION_SPOOL_MAX_BYTES,
+)
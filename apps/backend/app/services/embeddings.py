@@ -0,0 +1,85 @@
+import json
+import logging
+import numpy as np
+
+from typing import Any, Dict, List, Sequence
+
+from app.agent import EmbeddingManager, pack_embedding, unpack_embedding
+from app.models import ProcessedResume, ProcessedJob
+
+logger = logging.getLogger(__name__)
+
+
+async def embedding_columns(
+    embedding_manager: EmbeddingManager, text: str, subject: str
+) -> Dict[str, Any]:
+    """
+    Embeds `text` at ingest time and returns the `embedding`, `embedding_model`
+    and `embedding_dim` columns of a processed resume or job, so scoring does not
+    have to. Empty text or a failed embedding yields no columns; failures are
+    only logged (as `subject`), since scoring falls back to embedding on demand.
+    """
+    if not text:
+        return {}
+    try:
+        embedding = await embedding_manager.embed(text)
+    except Exception as e:
+        logger.warning(f"{subject} embedding at ingest failed: {str(e)}")
+        return {}
+    return {
+        "embedding": pack_embedding(embedding),
+        "embedding_model": embedding_manager.model_name(),
+        "embedding_dim": len(embedding),
+    }
+
+
+async def stored_embeddings(
+    embedding_manager: EmbeddingManager,
+    texts: Sequence[str],
+    rows: Sequence[ProcessedResume | ProcessedJob],
+) -> List[np.ndarray | List[float]]:
+    """
+    Returns the embeddings stored on the processed rows at ingest time. Rows
+    without one (or embedded by another model) are embedded from `texts` in one
+    batch and backfilled; the caller's session persists them.
+    """
+    model_name = embedding_manager.model_name()
+    embeddings: List[np.ndarray | List[float] | None] = [
+        unpack_embedding(row.embedding)
+        if row.embedding is not None and row.embedding_model == model_name
+        else None
+        for row in rows
+    ]
+    stale = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if not stale:
+        return embeddings
+
+    fresh = await embedding_manager.embed_many([texts[i] for i in stale])
+    for i, embedding in zip(stale, fresh):
+        rows[i].embedding = pack_embedding(embedding)
+        rows[i].embedding_model = model_name
+        rows[i].embedding_dim = len(embedding)
+        embeddings[i] = embedding
+    return embeddings
+
+
+async def stored_embedding(
+    embedding_manager: EmbeddingManager,
+    text: str,
+    row: ProcessedResume | ProcessedJob,
+) -> np.ndarray | List[float]:
+    """
+    Single-row variant of `stored_embeddings`.
+    """
+    return (await stored_embeddings(embedding_manager, [text], [row]))[0]
+
+
+def job_keywords_text(processed_job: ProcessedJob) -> str:
+    """
+    The joined extracted keywords a job is embedded from.
+    """
+    if not processed_job.extracted_keywords:
+        return ""
+    return ", ".join(
+        json.loads(processed_job.extracted_keywords).get("extracted_keywords", [])
+    )
@@ -0,0 +1,346 @@
+import uuid
+import asyncio
+import logging
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+
+from app.agent import SectionCallback
+from app.core import settings, AsyncSessionLocal
+from app.models import IngestionTask
+from .job_service import JobService
+from .resume_service import ResumeService
+from .exceptions import TaskNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class IngestionService:
+    """
+    Queues resume and job uploads in the `ingestion_tasks` table so the request
+    can return immediately; `IngestionWorkerPool` does the actual processing.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue_resume(
+        self, file_bytes: bytes, file_type: str, filename: str, content_type: str = "md"
+    ) -> str:
+        """
+        Queues a resume file for conversion and structured extraction.
+        """
+        return await self._enqueue(
+            kind="resume",
+            payload=file_bytes,
+            params={
+                "file_type": file_type,
+                "filename": filename,
+                "content_type": content_type,
+            },
+        )
+
+    async def enqueue_jobs(self, job_data: Dict[str, Any]) -> str:
+        """
+        Queues job descriptions for structured extraction. `job_data` must be
+        JSON-serializable, i.e. `JobUploadRequest.model_dump(mode="json")`.
+        """
+        return await self._enqueue(kind="job", payload=None, params=job_data)
+
+    async def _enqueue(
+        self, kind: str, payload: Optional[bytes], params: Dict[str, Any]
+    ) -> str:
+        task_id = str(uuid.uuid4())
+        self.db.add(
+            IngestionTask(
+                task_id=task_id,
+                kind=kind,
+                status="pending",
+                payload=payload,
+                params=params,
+            )
+        )
+        await self.db.commit()
+        ingestion_workers.notify()
+        logger.info(f"Queued {kind} ingestion task {task_id}")
+        return task_id
+
+    async def get_task(self, task_id: str) -> Dict[str, Any]:
+        """
+        Returns the status of an ingestion task, including its result once completed.
+
+        Raises:
+            TaskNotFoundError: If the task does not exist
+        """
+        task = await self.db.scalar(
+            select(IngestionTask).where(IngestionTask.task_id == task_id)
+        )
+        if not task:
+            raise TaskNotFoundError(task_id=task_id)
+
+        return {
+            "task_id": task.task_id,
+            "kind": task.kind,
+            "status": task.status,
+            # while a resume task is processing, `result` holds the structured
+            # sections extracted so far as {"sections": {...}}
+            "result": task.result,
+            "error": task.error,
+            "attempts": task.attempts,
+            "created_at": _isoformat(task.created_at),
+            "started_at": _isoformat(task.started_at),
+            "finished_at": _isoformat(task.finished_at),
+        }
+
+    async def process(self, task: IngestionTask) -> Dict[str, Any]:
+        """
+        Runs the synchronous upload pipeline for a claimed task.
+        """
+        match task.kind:
+            case "resume":
+                resume_id = await ResumeService(
+                    self.db, on_section=self._section_recorder(task.task_id)
+                ).convert_and_store_resume(file_bytes=task.payload, **task.params)
+                return {"resume_id": resume_id}
+            case "job":
+                job_ids = await JobService(self.db).create_and_store_job(task.params)
+                return {"job_id": job_ids}
+            case _:
+                raise ValueError(f"unknown ingestion task kind: {task.kind}")
+
+    @staticmethod
+    def _section_recorder(task_id: str) -> SectionCallback:
+        """
+        Returns an `on_section` callback persisting each extracted section on
+        the task row, in its own session so the pipeline's transaction is
+        unaffected.
+        """
+        sections: Dict[str, Any] = {}
+
+        async def _record(key: str, value: Any) -> None:
+            sections[key] = value
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(IngestionTask)
+                    .where(
+                        IngestionTask.task_id == task_id,
+                        IngestionTask.status == "processing",
+                    )
+                    .values(result={"sections": dict(sections)})
+                )
+                await db.commit()
+
+        return _record
+
+
+class IngestionWorkerPool:
+    """
+    Fixed pool of asyncio workers draining the `ingestion_tasks` table.
+
+    Tasks are claimed with a conditional update that records this pool as the
+    task's `owner`, so the table stays the single source of truth and no
+    external broker is needed. While a task runs its owner refreshes
+    `heartbeat_at`; a `processing` task whose lease has expired (its process
+    died or hung) is claimed again by any pool, and a task claimed
+    `max_attempts` times is marked failed instead of being retried. Workers
+    are woken by `notify()` on enqueue and otherwise poll every
+    `poll_interval` seconds. Started and stopped by the app lifespan.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        poll_interval: float,
+        lease_seconds: float,
+        max_attempts: int,
+    ) -> None:
+        self._workers = max(1, workers)
+        self._poll_interval = poll_interval
+        self._lease = timedelta(seconds=lease_seconds)
+        self._max_attempts = max(1, max_attempts)
+        self._owner = uuid.uuid4().hex
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self._workers)
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _claimable(self, now: datetime):
+        """
+        Condition matching pending tasks and processing tasks whose lease has
+        expired. Rows without a heartbeat predate leases and count as expired.
+        """
+        return or_(
+            IngestionTask.status == "pending",
+            and_(
+                IngestionTask.status == "processing",
+                or_(
+                    IngestionTask.heartbeat_at.is_(None),
+                    IngestionTask.heartbeat_at < now - self._lease,
+                ),
+            ),
+        )
+
+    async def _claim(self) -> Optional[str]:
+        async with AsyncSessionLocal() as db:
+            while True:
+                now = datetime.now(timezone.utc)
+                row = (
+                    await db.execute(
+                        select(IngestionTask.task_id, IngestionTask.attempts)
+                        .where(self._claimable(now))
+                        .order_by(IngestionTask.id)
+                        .limit(1)
+                    )
+                ).first()
+                if row is None:
+                    return None
+                task_id, attempts = row
+
+                if attempts >= self._max_attempts:
+                    values = {
+                        "status": "failed",
+                        "error": f"gave up after {attempts} attempts",
+                        "payload": None,
+                        "owner": None,
+                        "finished_at": now,
+                    }
+                else:
+                    values = {
+                        "status": "processing",
+                        "owner": self._owner,
+                        "started_at": now,
+                        "heartbeat_at": now,
+                        "attempts": IngestionTask.attempts + 1,
+                    }
+                result = await db.execute(
+                    update(IngestionTask)
+                    .where(
+                        IngestionTask.task_id == task_id,
+                        IngestionTask.attempts == attempts,
+                        self._claimable(now),
+                    )
+                    .values(**values)
+                )
+                await db.commit()
+                if result.rowcount != 1:
+                    continue
+                if values["status"] == "failed":
+                    logger.error(
+                        f"Ingestion task {task_id} failed: gave up after "
+                        f"{attempts} attempts"
+                    )
+                    continue
+                if attempts:
+                    logger.info(
+                        f"Reclaimed ingestion task {task_id} (attempt {attempts + 1})"
+                    )
+                return task_id
+
+    async def _heartbeat(self, task_id: str) -> None:
+        """
+        Refreshes the lease on a claimed task until cancelled.
+        """
+        interval = self._lease.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(IngestionTask)
+                        .where(
+                            IngestionTask.task_id == task_id,
+                            IngestionTask.owner == self._owner,
+                            IngestionTask.status == "processing",
+                        )
+                        .values(heartbeat_at=datetime.now(timezone.utc))
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Heartbeat for ingestion task {task_id} failed: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                task_id = await self._claim()
+            except Exception as e:
+                logger.error(f"Failed to claim ingestion task: {e}")
+                task_id = None
+
+            if task_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heartbeat = asyncio.create_task(self._heartbeat(task_id))
+            try:
+                await self._run(task_id)
+            finally:
+                heartbeat.cancel()
+
+    async def _run(self, task_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            task = await db.scalar(
+                select(IngestionTask).where(IngestionTask.task_id == task_id)
+            )
+            try:
+                result = await IngestionService(db).process(task)
+            except Exception as e:
+                logger.error(f"Ingestion task {task_id} failed: {e}")
+                await db.rollback()
+                values = {"status": "failed", "error": str(e)}
+            else:
+                logger.info(f"Ingestion task {task_id} completed")
+                values = {"status": "completed", "result": result}
+
+            # only the current lease holder records the outcome
+            result = await db.execute(
+                update(IngestionTask)
+                .where(
+                    IngestionTask.task_id == task_id,
+                    IngestionTask.owner == self._owner,
+                )
+                .values(
+                    payload=None,
+                    owner=None,
+                    finished_at=datetime.now(timezone.utc),
+                    **values,
+                )
+            )
+            await db.commit()
+            if result.rowcount != 1:
+                logger.warning(
+                    f"Ingestion task {task_id} was reclaimed by another worker; "
+                    "discarding this result"
+                )
+
+
+ingestion_workers = IngestionWorkerPool(
+    workers=settings.INGESTION_WORKERS,
+    poll_interval=settings.INGESTION_POLL_SECONDS,
+    lease_seconds=settings.INGESTION_LEASE_SECONDS,
+    max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+)
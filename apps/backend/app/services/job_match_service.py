@@ -0,0 +1,62 @@
+import logging
+import numpy as np
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List
+
+from app.models import ProcessedJob
+from app.agent import EmbeddingManager
+from .embeddings import stored_embedding
+from .resume_service import load_processed_resume
+from .vector_index import job_vector_index
+
+logger = logging.getLogger(__name__)
+
+
+class JobMatchService:
+    """
+    Ranks every stored job against a resume using the in-memory job vector index.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.embedding_manager = EmbeddingManager()
+
+    async def _get_resume_embedding(self, resume_id: str) -> np.ndarray:
+        """
+        Returns the resume embedding stored at ingest time, embedding and
+        backfilling it when missing or produced by another model.
+        """
+        resume, processed_resume = await load_processed_resume(self.db, resume_id)
+        embedding = await stored_embedding(
+            self.embedding_manager, resume.content, processed_resume
+        )
+        return np.asarray(embedding, dtype=np.float32)
+
+    async def top_k(self, resume_id: str, k: int = 10) -> List[Dict]:
+        """
+        Returns the `k` stored jobs most similar to the resume, best match first.
+        """
+        resume_embedding = await self._get_resume_embedding(resume_id)
+        await job_vector_index.ensure_loaded(self.db, self.embedding_manager)
+
+        matches = job_vector_index.top_k(resume_embedding, k)
+        if not matches:
+            return []
+
+        result = await self.db.execute(
+            select(ProcessedJob.job_id, ProcessedJob.job_title).where(
+                ProcessedJob.job_id.in_([job_id for job_id, _ in matches])
+            )
+        )
+        titles = dict(result.all())
+
+        return [
+            {
+                "job_id": job_id,
+                "job_title": titles.get(job_id),
+                "score": score,
+            }
+            for job_id, score in matches
+        ]
@@ -1,30 +1,53 @@
 import uuid
 import json
+import asyncio
+import hashlib
 import logging
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pydantic import ValidationError
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agent import AgentManager
-from app.prompt import prompt_factory
+from app.agent import (
+    AgentManager,
+    EmbeddingManager,
+    StrategyError,
+    unpack_embedding,
+)
+from app.core import settings
+from app.prompt import prompt_factory, build_structured_prompts, merge_extractions
 from app.schemas.json import json_schema_factory
 from app.models import Job, Resume, ProcessedJob
 from app.schemas.pydantic import StructuredJobModel
+from .embeddings import embedding_columns
 from .exceptions import JobNotFoundError
+from .vector_index import job_vector_index
 
 logger = logging.getLogger(__name__)
 
 
 class JobService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, max_concurrency: int | None = None):
         self.db = db
-        self.json_agent_manager = AgentManager(model="gemma3:4b")
+        self.json_agent_manager = AgentManager(
+            strategy="json_stream", model="gemma3:4b"
+        )
+        self.embedding_manager = EmbeddingManager()
+        # upper bound on structured-extraction LLM calls in flight per upload
+        self.max_concurrency = max(
+            1, max_concurrency or settings.JOB_EXTRACTION_CONCURRENCY
+        )
 
     async def create_and_store_job(self, job_data: dict) -> List[str]:
         """
         Stores job data in the database and returns a list of job IDs.
+
+        Job descriptions are extracted concurrently (at most `max_concurrency` at a
+        time) and every `Job`/`ProcessedJob` row is written in one transaction. A
+        description identical to one already stored for the same resume (ignoring
+        whitespace) returns the existing job_id without another extraction.
         """
         resume_id = str(job_data.get("resume_id"))
 
@@ -33,24 +56,123 @@ class JobService:
                 f"resume corresponding to resume_id: {resume_id} not found"
             )
 
-        job_ids = []
-        for job_description in job_data.get("job_descriptions", []):
-            job_id = str(uuid.uuid4())
-            job = Job(
-                job_id=job_id,
-                resume_id=str(resume_id),
-                content=job_description,
-            )
-            self.db.add(job)
+        job_descriptions = job_data.get("job_descriptions", [])
+        try:
+            return await self._store_jobs(resume_id, job_descriptions)
+        except IntegrityError:
+            # an identical description was stored concurrently; the retry
+            # picks up the committed row instead of inserting a duplicate
+            await self.db.rollback()
+            return await self._store_jobs(resume_id, job_descriptions)
+
+    @staticmethod
+    def _content_hash(job_description: str) -> str:
+        normalized = " ".join(job_description.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
-            await self._extract_and_store_structured_job(
-                job_id=job_id, job_description_text=job_description
+    async def _store_jobs(
+        self, resume_id: str, job_descriptions: List[str]
+    ) -> List[str]:
+        hashes = [self._content_hash(d) for d in job_descriptions]
+        result = await self.db.execute(
+            select(Job.job_id, Job.content_hash, ProcessedJob.job_id)
+            .outerjoin(ProcessedJob, ProcessedJob.job_id == Job.job_id)
+            .where(Job.resume_id == resume_id, Job.content_hash.in_(set(hashes)))
+        )
+        existing = {
+            content_hash: (job_id, processed_job_id is not None)
+            for job_id, content_hash, processed_job_id in result
+        }
+
+        # content_hash -> job_id for every description, and the subset that
+        # still needs extraction as content_hash -> (description, is_new_job)
+        job_ids: Dict[str, str] = {}
+        pending: Dict[str, Tuple[str, bool]] = {}
+        for job_description, content_hash in zip(job_descriptions, hashes):
+            if content_hash in job_ids:
+                continue
+            if content_hash in existing:
+                job_id, processed = existing[content_hash]
+                job_ids[content_hash] = job_id
+                if processed:
+                    logger.info(f"Job description matches existing job {job_id}")
+                else:
+                    pending[content_hash] = (job_description, False)
+            else:
+                job_ids[content_hash] = str(uuid.uuid4())
+                pending[content_hash] = (job_description, True)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _extract(job_description: str) -> Dict[str, Any]:
+            async with semaphore:
+                structured_job = await self._extract_structured_json(job_description)
+            if not structured_job:
+                logger.info("Structured job extraction failed.")
+                return {}
+            return structured_job
+
+        tasks = [
+            asyncio.create_task(_extract(job_description))
+            for job_description, _ in pending.values()
+        ]
+        try:
+            if tasks:
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_EXCEPTION
+                )
+                failed = next((t for t in done if t.exception()), None)
+                if failed is not None:
+                    raise failed.exception()
+            structured_jobs = [task.result() for task in tasks]
+        finally:
+            # a failed extraction must not leave its siblings holding
+            # semaphore and admission slots for a batch that is discarded
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        job_columns = await asyncio.gather(
+            *(
+                embedding_columns(
+                    self.embedding_manager,
+                    ", ".join(structured_job.get("extracted_keywords") or []),
+                    "Job keyword",
+                )
+                for structured_job in structured_jobs
             )
+        )
+
+        indexed = []
+        for (content_hash, (job_description, is_new)), structured_job, columns in zip(
+            pending.items(), structured_jobs, job_columns
+        ):
+            job_id = job_ids[content_hash]
+            if is_new:
+                self.db.add(
+                    Job(
+                        job_id=job_id,
+                        resume_id=str(resume_id),
+                        content=job_description,
+                        content_hash=content_hash,
+                    )
+                )
+            if structured_job:
+                self.db.add(
+                    self._build_processed_job(job_id, structured_job, columns)
+                )
+                if columns:
+                    indexed.append((job_id, columns))
             logger.info(f"Job ID: {job_id}")
-            job_ids.append(job_id)
 
         await self.db.commit()
-        return job_ids
+
+        for job_id, columns in indexed:
+            job_vector_index.add(
+                job_id,
+                unpack_embedding(columns["embedding"]),
+                columns["embedding_model"],
+            )
+        return [job_ids[content_hash] for content_hash in hashes]
 
     async def _is_resume_available(self, resume_id: str) -> bool:
         """
@@ -60,18 +182,16 @@ class JobService:
         result = await self.db.scalar(query)
         return result is not None
 
-    async def _extract_and_store_structured_job(
-        self, job_id, job_description_text: str
-    ):
+    def _build_processed_job(
+        self,
+        job_id: str,
+        structured_job: Dict[str, Any],
+        columns: Dict[str, Any],
+    ) -> ProcessedJob:
         """
-        extract and store structured job data in the database
+        Maps extracted structured job data onto a `ProcessedJob` row.
         """
-        structured_job = await self._extract_structured_json(job_description_text)
-        if not structured_job:
-            logger.info("Structured job extraction failed.")
-            return None
-
-        processed_job = ProcessedJob(
+        return ProcessedJob(
             job_id=job_id,
             job_title=structured_job.get("job_title"),
             company_profile=json.dumps(structured_job.get("company_profile"))
@@ -104,14 +224,9 @@ class JobService:
             )
             if structured_job.get("extracted_keywords")
             else None,
+            **columns,
         )
 
-        self.db.add(processed_job)
-        await self.db.flush()
-        await self.db.commit()
-
-        return job_id
-
     async def _extract_structured_json(
         self, job_description_text: str
     ) -> Dict[str, Any] | None:
@@ -120,12 +235,33 @@ class JobService:
         return the data in exact JSON schema we need.
         """
         prompt_template = prompt_factory.get("structured_job")
-        prompt = prompt_template.format(
-            json.dumps(json_schema_factory.get("structured_job"), indent=2),
-            job_description_text,
-        )
-        logger.info(f"Structured Job Prompt: {prompt}")
-        raw_output = await self.json_agent_manager.run(prompt=prompt)
+        outputs = []
+        try:
+            # chunks of an oversized description run one after another, so each
+            # description still holds a single extraction slot
+            for structured_prompt in build_structured_prompts(
+                prompt_template,
+                json_schema_factory.get("structured_job"),
+                job_description_text,
+            ):
+                logger.info(f"Structured Job Prompt: {structured_prompt.prompt}")
+                outputs.append(
+                    await self.json_agent_manager.run(
+                        prompt=structured_prompt.prompt,
+                        max_length=structured_prompt.max_length,
+                        json_schema=structured_prompt.json_schema,
+                        response_model=StructuredJobModel,
+                        # ingestion yields model capacity to interactive improve
+                        # requests
+                        priority="bulk",
+                    )
+                )
+        except StrategyError as e:
+            # unparseable or schema-violating output even after the repair
+            # retry; the job is stored without structured data, as before
+            logger.info(f"Structured job extraction failed: {e}")
+            return None
+        raw_output = merge_extractions(outputs)
 
         try:
             structured_job: StructuredJobModel = StructuredJobModel.model_validate(
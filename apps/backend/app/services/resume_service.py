@@ -1,36 +1,84 @@
-import os
 import uuid
 import json
-import tempfile
+import asyncio
+import hashlib
 import logging
 
-from markitdown import MarkItDown
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.models import Resume, ProcessedResume
-from app.agent import AgentManager
-from app.prompt import prompt_factory
+from app.agent import (
+    AgentManager,
+    EmbeddingManager,
+    SectionCallback,
+    notify_section,
+)
+from app.core import settings
+from app.prompt import (
+    prompt_factory,
+    build_structured_prompts,
+    estimate_tokens,
+    merge_extractions,
+)
 from app.schemas.json import json_schema_factory
 from app.schemas.pydantic import StructuredResumeModel
-from .exceptions import ResumeNotFoundError, ResumeValidationError
+from .conversion import document_converter
+from .embeddings import embedding_columns
+from .sections import group_resume_sections
+from .exceptions import (
+    ResumeNotFoundError,
+    ResumeParsingError,
+    ResumeValidationError,
+)
 
 logger = logging.getLogger(__name__)
 
 
+async def load_processed_resume(
+    db: AsyncSession, resume_id: str
+) -> Tuple[Resume, ProcessedResume]:
+    """
+    Fetches a resume together with its processed data.
+
+    Raises:
+        ResumeNotFoundError: If the resume does not exist.
+        ResumeParsingError: If the resume has no processed data.
+    """
+    resume = await db.scalar(select(Resume).where(Resume.resume_id == resume_id))
+    if not resume:
+        raise ResumeNotFoundError(resume_id=resume_id)
+
+    processed_resume = await db.scalar(
+        select(ProcessedResume).where(ProcessedResume.resume_id == resume_id)
+    )
+    if not processed_resume:
+        raise ResumeParsingError(resume_id=resume_id)
+    return resume, processed_resume
+
+
 class ResumeService:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self, db: AsyncSession, on_section: Optional[SectionCallback] = None
+    ):
         self.db = db
-        self.md = MarkItDown(enable_plugins=False)
-        self.json_agent_manager = AgentManager(model="gemma3:4b")
+        self.json_agent_manager = AgentManager(
+            strategy="json_stream", model="gemma3:4b"
+        )
+        # called with each structured resume section as soon as it is extracted
+        self.on_section = on_section
+        self.embedding_manager = EmbeddingManager()
 
     async def convert_and_store_resume(
         self, file_bytes: bytes, file_type: str, filename: str, content_type: str = "md"
     ):
         """
-        Converts resume file (PDF/DOCX) to text using MarkItDown and stores it in the database.
+        Converts resume file (PDF/DOCX) to text using MarkItDown (off the event loop,
+        see `DocumentConverter`) and stores it in the database. A file identical to
+        one already stored returns the existing resume_id without re-processing.
 
         Args:
             file_bytes: Raw bytes of the uploaded file
@@ -41,25 +89,55 @@ class ResumeService:
         Returns:
             None
         """
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=self._get_file_extension(file_type)
-        ) as temp_file:
-            temp_file.write(file_bytes)
-            temp_path = temp_file.name
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+        existing = await self._get_resume_by_hash(content_hash)
+        if existing:
+            return await self._reuse_existing_resume(existing)
 
+        text_content = await document_converter.convert(
+            file_bytes, self._get_file_extension(file_type)
+        )
         try:
-            result = self.md.convert(temp_path)
-            text_content = result.text_content
-            resume_id = await self._store_resume_in_db(text_content, content_type)
+            resume_id = await self._store_resume_in_db(
+                text_content, content_type, content_hash
+            )
+        except IntegrityError:
+            # an identical upload was stored concurrently
+            await self.db.rollback()
+            existing = await self._get_resume_by_hash(content_hash)
+            if not existing:
+                raise
+            return await self._reuse_existing_resume(existing)
 
-            await self._extract_and_store_structured_resume(
-                resume_id=resume_id, resume_text=text_content
+        await self._extract_and_store_structured_resume(
+            resume_id=resume_id, resume_text=text_content
+        )
+
+        return resume_id
+
+    async def _get_resume_by_hash(self, content_hash: str) -> Resume | None:
+        return await self.db.scalar(
+            select(Resume).where(Resume.content_hash == content_hash)
+        )
+
+    async def _reuse_existing_resume(self, resume: Resume) -> str:
+        """
+        Returns the ID of an already stored copy of an uploaded resume, running
+        the structured extraction again only if it never succeeded.
+        """
+        processed_resume_id = await self.db.scalar(
+            select(ProcessedResume.resume_id).where(
+                ProcessedResume.resume_id == resume.resume_id
             )
+        )
+        if processed_resume_id:
+            logger.info(f"Resume upload matches existing resume {resume.resume_id}")
+            return resume.resume_id
 
-            return resume_id
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        await self._extract_and_store_structured_resume(
+            resume_id=resume.resume_id, resume_text=resume.content
+        )
+        return resume.resume_id
 
     def _get_file_extension(self, file_type: str) -> str:
         """Returns the appropriate file extension based on MIME type"""
@@ -72,13 +150,18 @@ class ResumeService:
             return ".docx"
         return ""
 
-    async def _store_resume_in_db(self, text_content: str, content_type: str):
+    async def _store_resume_in_db(
+        self, text_content: str, content_type: str, content_hash: str | None = None
+    ):
         """
         Stores the parsed resume content in the database.
         """
         resume_id = str(uuid.uuid4())
         resume = Resume(
-            resume_id=resume_id, content=text_content, content_type=content_type
+            resume_id=resume_id,
+            content=text_content,
+            content_type=content_type,
+            content_hash=content_hash,
         )
 
         self.db.add(resume)
@@ -102,6 +185,10 @@ class ResumeService:
                     message="Failed to extract structured data from resume. Please ensure your resume contains all required sections.",
                 )
 
+            columns = await embedding_columns(
+                self.embedding_manager, resume_text, "Resume"
+            )
+
             processed_resume = ProcessedResume(
                 resume_id=resume_id,
                 personal_data=json.dumps(structured_resume.get("personal_data", {}))
@@ -142,6 +229,7 @@ class ResumeService:
                     if structured_resume.get("extracted_keywords")
                     else None
                 ),
+                **columns,
             )
 
             self.db.add(processed_resume)
@@ -163,13 +251,12 @@ class ResumeService:
         Uses the AgentManager+JSONWrapper to ask the LLM to
         return the data in exact JSON schema we need.
         """
-        prompt_template = prompt_factory.get("structured_resume")
-        prompt = prompt_template.format(
-            json.dumps(json_schema_factory.get("structured_resume"), indent=2),
-            resume_text,
-        )
-        logger.info(f"Structured Resume Prompt: {prompt}")
-        raw_output = await self.json_agent_manager.run(prompt=prompt)
+        schema = json_schema_factory.get("structured_resume")
+        sections = self._group_sections_for_extraction(resume_text)
+        if sections:
+            raw_output = await self._extract_sections(schema, sections)
+        else:
+            raw_output = await self._run_extraction(schema, resume_text)
 
         try:
             structured_resume: StructuredResumeModel = (
@@ -191,6 +278,94 @@ class ResumeService:
             )
         return structured_resume.model_dump()
 
+    async def _run_extraction(self, schema: Dict[str, Any], text: str) -> Any:
+        prompt_template = prompt_factory.get("structured_resume")
+        structured_prompts = build_structured_prompts(prompt_template, schema, text)
+        chunked = len(structured_prompts) > 1
+        outputs = []
+        for structured_prompt in structured_prompts:
+            logger.info(f"Structured Resume Prompt: {structured_prompt.prompt}")
+            outputs.append(
+                await self.json_agent_manager.run(
+                    prompt=structured_prompt.prompt,
+                    max_length=structured_prompt.max_length,
+                    json_schema=structured_prompt.json_schema,
+                    response_model=StructuredResumeModel,
+                    # ingestion yields model capacity to interactive improve requests
+                    priority="bulk",
+                    # a chunk only holds part of each section, so sections are
+                    # reported once the chunks are merged
+                    on_section=None if chunked else self.on_section,
+                )
+            )
+        if not chunked:
+            return outputs[0]
+
+        merged = merge_extractions(outputs)
+        if isinstance(merged, dict):
+            for key, value in merged.items():
+                await notify_section(self.on_section, key, value)
+        return merged
+
+    def _group_sections_for_extraction(
+        self, resume_text: str
+    ) -> Dict[Optional[str], str] | None:
+        """
+        Returns the resume grouped by schema section when it is long enough, and
+        structured enough, to be worth extracting section by section.
+        """
+        if estimate_tokens(resume_text) < settings.RESUME_SECTION_MIN_TOKENS:
+            return None
+        sections = group_resume_sections(resume_text)
+        if len([key for key in sections if key is not None]) < 2:
+            return None
+        return sections
+
+    async def _extract_sections(
+        self, schema: Dict[str, Any], sections: Dict[Optional[str], str]
+    ) -> Dict[str, Any]:
+        """
+        Extracts each resume section with its own slice of the schema in
+        parallel, then merges the answers into one structured resume. The header
+        and unrecognised sections feed the personal data; every section
+        contributes keywords.
+        """
+        requests = [
+            (["Personal Data"], sections.get(None) or next(iter(sections.values())))
+        ]
+        requests += [([key], text) for key, text in sections.items() if key is not None]
+
+        semaphore = asyncio.Semaphore(settings.RESUME_SECTION_CONCURRENCY)
+
+        async def _extract(keys: List[str], text: str) -> Any:
+            section_schema = {key: schema[key] for key in keys + ["Extracted Keywords"]}
+            async with semaphore:
+                return await self._run_extraction(section_schema, text)
+
+        logger.info(f"Extracting resume in {len(requests)} sections")
+        outputs = await asyncio.gather(
+            *(_extract(keys, text) for keys, text in requests)
+        )
+
+        merged: Dict[str, Any] = {
+            key: [] for key, value in schema.items() if isinstance(value, list)
+        }
+        for (keys, _), output in zip(requests, outputs):
+            if not isinstance(output, dict):
+                continue
+            for key in keys:
+                value = output.get(key)
+                if isinstance(merged.get(key), list) and isinstance(value, list):
+                    merged[key].extend(value)
+                elif value is not None:
+                    merged[key] = value
+            keywords = output.get("Extracted Keywords")
+            if isinstance(keywords, list):
+                merged["Extracted Keywords"].extend(keywords)
+
+        merged["Extracted Keywords"] = list(dict.fromkeys(merged["Extracted Keywords"]))
+        return merged
+
     async def get_resume_with_processed_data(self, resume_id: str) -> Optional[Dict]:
         """
         Fetches both resume and processed resume data from the database and combines them.
@@ -1,5 +1,6 @@
 import gc
 import json
+import time
 import asyncio
 import logging
 import markdown
@@ -8,13 +9,28 @@ import numpy as np
 from sqlalchemy.future import select
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Optional, Tuple, AsyncGenerator
-
-from app.prompt import prompt_factory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, AsyncGenerator
+
+from app.core import settings
+from app.prompt import (
+    prompt_factory,
+    build_structured_prompts,
+    context_window,
+    estimate_tokens,
+    merge_extractions,
+)
 from app.schemas.json import json_schema_factory
-from app.schemas.pydantic import ResumePreviewerModel
-from app.agent import EmbeddingManager, AgentManager
+from app.schemas.pydantic import ImprovementOptions, ResumePreviewerModel
+from app.agent import (
+    EmbeddingManager,
+    AgentManager,
+    DeadlineExceededError,
+)
 from app.models import Resume, Job, ProcessedResume, ProcessedJob
+from .sections import resume_embedding_chunks
+from .embeddings import stored_embedding, stored_embeddings, job_keywords_text
+from .resume_service import load_processed_resume
+from .vector_index import l2_normalize
 from .exceptions import (
     ResumeNotFoundError,
     JobNotFoundError,
@@ -35,12 +51,35 @@ class ScoreImprovementService:
     the scoring process.
     """
 
-    def __init__(self, db: AsyncSession, max_retries: int = 5):
+    def __init__(
+        self,
+        db: AsyncSession,
+        max_retries: int = 5,
+        candidates: int | None = None,
+        max_concurrency: int | None = None,
+        embedding_mode: str | None = None,
+        options: ImprovementOptions | None = None,
+        deadline: float | None = None,
+    ):
         self.db = db
         self.max_retries = max_retries
+        # when to stop the improvement loop, see `_stop_reason`
+        self.options = options or ImprovementOptions()
+        # hard deadline (see `deadline_after`) passed to every LLM call, so an
+        # abandoned or overdue request stops generating
+        self.deadline = deadline
+        # candidates > 1 fans each attempt out into that many concurrent
+        # rewrites, at most `max_concurrency` of them in flight at once
+        self.candidates = max(1, candidates or settings.IMPROVE_CANDIDATES)
+        self.max_concurrency = max(
+            1, max_concurrency or settings.IMPROVE_MAX_CONCURRENCY
+        )
         self.md_agent_manager = AgentManager(strategy="md")
         self.json_agent_manager = AgentManager()
         self.embedding_manager = EmbeddingManager()
+        # "sections" embeds resumes chunk by chunk so rewrites only re-embed the
+        # chunks they changed, see `_embed_resumes`
+        self.embedding_mode = embedding_mode or settings.IMPROVE_EMBEDDING_MODE
 
     def _validate_resume_keywords(
         self, processed_resume: ProcessedResume, resume_id: str
@@ -82,20 +121,7 @@ class ScoreImprovementService:
         """
         Fetches the resume from the database.
         """
-        query = select(Resume).where(Resume.resume_id == resume_id)
-        result = await self.db.execute(query)
-        resume = result.scalars().first()
-
-        if not resume:
-            raise ResumeNotFoundError(resume_id=resume_id)
-
-        query = select(ProcessedResume).where(ProcessedResume.resume_id == resume_id)
-        result = await self.db.execute(query)
-        processed_resume = result.scalars().first()
-
-        if not processed_resume:
-            raise ResumeParsingError(resume_id=resume_id)
-
+        resume, processed_resume = await load_processed_resume(self.db, resume_id)
         self._validate_resume_keywords(processed_resume, resume_id)
 
         return resume, processed_resume
@@ -122,6 +148,52 @@ class ScoreImprovementService:
 
         return job, processed_job
 
+    async def _embed_resumes(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embeds resume texts for the improvement loop.
+
+        In "sections" mode each resume is split into section-aligned chunks
+        (`resume_embedding_chunks`) and its vector is the length-weighted mean of
+        the normalized chunk embeddings. Chunk embeddings are content-addressed
+        in the embedding cache, so a rewrite only sends the chunks it changed
+        to the provider, and all texts share a single batch.
+        """
+        if self.embedding_mode != "sections":
+            embeddings = await self.embedding_manager.embed_many(texts)
+            return [np.asarray(embedding) for embedding in embeddings]
+
+        chunked = [
+            resume_embedding_chunks(text, settings.IMPROVE_EMBEDDING_CHUNK_TOKENS)
+            for text in texts
+        ]
+        unique = list(dict.fromkeys(chunk for chunks in chunked for chunk in chunks))
+        vectors = dict(
+            zip(unique, l2_normalize(await self.embedding_manager.embed_many(unique)))
+        )
+
+        pooled = []
+        for chunks in chunked:
+            weights = [estimate_tokens(chunk) for chunk in chunks]
+            pooled.append(
+                np.average(
+                    [vectors[chunk] for chunk in chunks], axis=0, weights=weights
+                )
+            )
+        return pooled
+
+    async def _get_resume_embedding(
+        self, resume: Resume, processed_resume: ProcessedResume
+    ) -> np.ndarray:
+        """
+        Baseline resume embedding for the improvement loop, computed the same
+        way as the embeddings of its rewrites.
+        """
+        if self.embedding_mode == "sections":
+            return (await self._embed_resumes([resume.content]))[0]
+        return await stored_embedding(
+            self.embedding_manager, resume.content, processed_resume
+        )
+
     def calculate_cosine_similarity(
         self,
         extracted_job_keywords_embedding: np.ndarray,
@@ -138,7 +210,173 @@ class ScoreImprovementService:
 
         return float(np.dot(ejk, re) / (np.linalg.norm(ejk) * np.linalg.norm(re)))
 
-    async def improve_score_with_llm(
+    def calculate_similarity_matrix(
+        self,
+        resume_embeddings: np.ndarray | Sequence[Sequence[float]],
+        job_embeddings: np.ndarray | Sequence[Sequence[float]],
+    ) -> np.ndarray:
+        """
+        Cosine similarity of every resume against every job as an (N, M) matrix.
+        Each side is L2-normalized once, then scored with a single matmul.
+        """
+        return l2_normalize(resume_embeddings) @ l2_normalize(job_embeddings).T
+
+    async def score_many(self, resume_ids: List[str], job_ids: List[str]) -> Dict:
+        """
+        Scores N resumes against M jobs without any LLM improvement step.
+        """
+        resume_ids = list(dict.fromkeys(resume_ids))
+        job_ids = list(dict.fromkeys(job_ids))
+
+        result = await self.db.execute(
+            select(Resume, ProcessedResume)
+            .outerjoin(ProcessedResume, ProcessedResume.resume_id == Resume.resume_id)
+            .where(Resume.resume_id.in_(resume_ids))
+        )
+        resumes = {resume.resume_id: (resume, processed) for resume, processed in result}
+
+        result = await self.db.execute(
+            select(Job, ProcessedJob)
+            .outerjoin(ProcessedJob, ProcessedJob.job_id == Job.job_id)
+            .where(Job.job_id.in_(job_ids))
+        )
+        jobs = {job.job_id: (job, processed) for job, processed in result}
+
+        for resume_id in resume_ids:
+            if resume_id not in resumes:
+                raise ResumeNotFoundError(resume_id=resume_id)
+            if resumes[resume_id][1] is None:
+                raise ResumeParsingError(resume_id=resume_id)
+        for job_id in job_ids:
+            if job_id not in jobs:
+                raise JobNotFoundError(job_id=job_id)
+            if jobs[job_id][1] is None:
+                raise JobParsingError(job_id=job_id)
+            self._validate_job_keywords(jobs[job_id][1], job_id)
+
+        processed_resumes = [resumes[resume_id][1] for resume_id in resume_ids]
+        processed_jobs = [jobs[job_id][1] for job_id in job_ids]
+        resume_embeddings, job_embeddings = await asyncio.gather(
+            stored_embeddings(
+                self.embedding_manager,
+                [resumes[resume_id][0].content for resume_id in resume_ids],
+                processed_resumes,
+            ),
+            stored_embeddings(
+                self.embedding_manager,
+                [job_keywords_text(processed) for processed in processed_jobs],
+                processed_jobs,
+            ),
+        )
+
+        scores = self.calculate_similarity_matrix(
+            np.vstack(resume_embeddings), np.vstack(job_embeddings)
+        )
+
+        return {
+            "resume_ids": resume_ids,
+            "job_ids": job_ids,
+            "scores": scores.tolist(),
+        }
+
+    @staticmethod
+    def _candidate_generation_args(index: int) -> Dict[str, Any]:
+        """
+        Sampling arguments for the `index`-th parallel candidate. The first one is
+        the deterministic rewrite the sequential loop would produce; the rest
+        sample at rising temperatures with distinct seeds.
+        """
+        return {"temperature": min(1.0, 0.25 * index), "seed": index}
+
+    async def _generate_candidates(
+        self, prompt: str, **generation_args: Any
+    ) -> List[str]:
+        """
+        Generates `self.candidates` rewrites of the same prompt concurrently.
+        Failed candidates are dropped; if every one fails the first error is raised.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _generate(index: int) -> str:
+            async with semaphore:
+                return await self.md_agent_manager.run(
+                    prompt,
+                    **generation_args,
+                    **self._candidate_generation_args(index),
+                )
+
+        results = await asyncio.gather(
+            *(_generate(i) for i in range(self.candidates)), return_exceptions=True
+        )
+        candidates = [r for r in results if not isinstance(r, BaseException)]
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if not candidates:
+            raise errors[0]
+        if errors:
+            logger.warning(
+                f"{len(errors)}/{self.candidates} improvement candidates failed: {errors[0]}"
+            )
+        return candidates
+
+    async def _best_candidate(
+        self,
+        prompt: str,
+        extracted_job_keywords_embedding: np.ndarray,
+        **generation_args: Any,
+    ) -> Tuple[str, float]:
+        """
+        Returns the highest scoring of the parallel candidates for `prompt`,
+        embedding all of them in a single batch.
+        """
+        candidates = await self._generate_candidates(prompt, **generation_args)
+        embeddings = await self._embed_resumes(candidates)
+        scores = self.calculate_similarity_matrix(
+            embeddings, extracted_job_keywords_embedding
+        )[:, 0]
+        best = int(np.argmax(scores))
+        logger.info(
+            f"Scored {len(candidates)} candidates, best: {float(scores[best])}"
+        )
+        return candidates[best], float(scores[best])
+
+    def _stop_reason(
+        self, original_score: float, best_score: float
+    ) -> Optional[str]:
+        """
+        Returns why the loop can stop with `best_score`, or None to keep going.
+
+        Without a `target_score` the first attempt that beats the original by
+        more than zero and at least `min_delta` ends the loop; with one, better
+        rewrites keep being refined until the target is reached.
+        """
+        gain = best_score - original_score
+        if self.options.target_score is not None:
+            if best_score >= self.options.target_score and (
+                gain == 0 or gain >= self.options.min_delta
+            ):
+                return "target_reached"
+            return None
+        if gain > 0 and gain >= self.options.min_delta:
+            return "improved"
+        return None
+
+    def _budget_exhausted(
+        self, started_at: float, tokens_used: int, next_attempt_tokens: int
+    ) -> Optional[str]:
+        """
+        Returns why no further attempt may start, or None if one can.
+        """
+        deadline = self.options.deadline_seconds
+        if deadline is not None and time.monotonic() - started_at >= deadline:
+            return "deadline"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "deadline"
+        budget = self.options.max_tokens
+        if budget is not None and tokens_used + next_attempt_tokens > budget:
+            return "token_budget"
+        return None
+
+    async def _improvement_events(
         self,
         resume: str,
         extracted_resume_keywords: str,
@@ -146,14 +384,32 @@ class ScoreImprovementService:
         extracted_job_keywords: str,
         previous_cosine_similarity_score: float,
         extracted_job_keywords_embedding: np.ndarray,
-    ) -> Tuple[str, float]:
+        stream_tokens: bool = False,
+    ) -> AsyncGenerator[Tuple[str, Any, Any], None]:
+        """
+        Runs the improvement loop, yielding `("token", attempt, chunk)` for every
+        generated chunk when `stream_tokens` is set, `("scored", attempt, score)`
+        after each attempt, `("stopped", reason, attempts)` and finally
+        `("result", resume, score)`. With more than one candidate, each attempt
+        scores the best of a concurrent batch.
+
+        `self.options` decides when to stop: see `_stop_reason` for the score
+        targets, while the deadline and token budget are checked before each
+        attempt (token counts are estimates, providers do not report usage).
+        """
         prompt_template = prompt_factory.get("resume_improvement")
         best_resume, best_score = resume, previous_cosine_similarity_score
+        started_at, tokens_used = time.monotonic(), 0
+        # a resume already at the target needs no attempt at all
+        reason = (
+            "target_reached"
+            if self.options.target_score is not None
+            and best_score >= self.options.target_score
+            else None
+        )
 
-        for attempt in range(1, self.max_retries + 1):
-            logger.info(
-                f"Attempt {attempt}/{self.max_retries} to improve resume score."
-            )
+        attempt = 0
+        while reason is None and attempt < self.max_retries:
             prompt = prompt_template.format(
                 raw_job_description=job,
                 extracted_job_keywords=extracted_job_keywords,
@@ -161,32 +417,117 @@ class ScoreImprovementService:
                 extracted_resume_keywords=extracted_resume_keywords,
                 current_cosine_similarity=best_score,
             )
-            improved = await self.md_agent_manager.run(prompt)
-            emb = await self.embedding_manager.embed(text=improved)
-            score = self.calculate_cosine_similarity(
-                emb, extracted_job_keywords_embedding
+            # the answer is a rewrite of the resume, so budget for about as much again
+            attempt_tokens = estimate_tokens(prompt) + estimate_tokens(best_resume)
+            reason = self._budget_exhausted(
+                started_at, tokens_used, attempt_tokens * self.candidates
             )
+            if reason:
+                break
 
-            if score > best_score:
-                return improved, score
+            attempt += 1
+            logger.info(
+                f"Attempt {attempt}/{self.max_retries} to improve resume score."
+            )
+            max_length = context_window(attempt_tokens)
+            try:
+                if self.candidates > 1:
+                    # concurrent candidates are not streamed token by token
+                    improved, score = await self._best_candidate(
+                        prompt,
+                        extracted_job_keywords_embedding,
+                        max_length=max_length,
+                        deadline=self.deadline,
+                    )
+                else:
+                    if stream_tokens:
+                        chunks = []
+                        async for chunk in self.md_agent_manager.stream(
+                            prompt, max_length=max_length, deadline=self.deadline
+                        ):
+                            chunks.append(chunk)
+                            yield "token", attempt, chunk
+                        improved = self.md_agent_manager.strategy.parse(
+                            "".join(chunks).strip()
+                        )
+                    else:
+                        improved = await self.md_agent_manager.run(
+                            prompt, max_length=max_length, deadline=self.deadline
+                        )
+                    emb = (await self._embed_resumes([improved]))[0]
+                    score = self.calculate_cosine_similarity(
+                        emb, extracted_job_keywords_embedding
+                    )
+            except DeadlineExceededError:
+                logger.warning(
+                    f"Attempt {attempt} abandoned, the request deadline passed."
+                )
+                reason = "deadline"
+                break
+            tokens_used += attempt_tokens * self.candidates
+            yield "scored", attempt, score
 
             logger.info(
                 f"Attempt {attempt} resulted in score: {score}, best score so far: {best_score}"
             )
+            if score > best_score:
+                best_resume, best_score = improved, score
+            reason = self._stop_reason(previous_cosine_similarity_score, best_score)
 
-        return best_resume, best_score
+        reason = reason or "max_retries"
+        logger.info(
+            f"Improvement loop stopped ({reason}) after {attempt} attempts, ~{tokens_used} tokens."
+        )
+        yield "stopped", reason, attempt
+        yield "result", best_resume, best_score
+
+    async def improve_score_with_llm(
+        self,
+        resume: str,
+        extracted_resume_keywords: str,
+        job: str,
+        extracted_job_keywords: str,
+        previous_cosine_similarity_score: float,
+        extracted_job_keywords_embedding: np.ndarray,
+    ) -> Tuple[str, float]:
+        async for event in self._improvement_events(
+            resume=resume,
+            extracted_resume_keywords=extracted_resume_keywords,
+            job=job,
+            extracted_job_keywords=extracted_job_keywords,
+            previous_cosine_similarity_score=previous_cosine_similarity_score,
+            extracted_job_keywords_embedding=extracted_job_keywords_embedding,
+        ):
+            match event:
+                case ("result", improved, score):
+                    return improved, score
 
     async def get_resume_for_previewer(self, updated_resume: str) -> Dict:
         """
-        Returns the updated resume in a format suitable for the dashboard.
+        Returns the updated resume in a format suitable for the dashboard, or
+        None if it cannot be extracted (in time).
         """
         prompt_template = prompt_factory.get("structured_resume")
-        prompt = prompt_template.format(
-            json.dumps(json_schema_factory.get("resume_preview"), indent=2),
-            updated_resume,
-        )
-        logger.info(f"Structured Resume Prompt: {prompt}")
-        raw_output = await self.json_agent_manager.run(prompt=prompt)
+        outputs = []
+        try:
+            for structured_prompt in build_structured_prompts(
+                prompt_template,
+                json_schema_factory.get("resume_preview"),
+                updated_resume,
+            ):
+                logger.info(f"Structured Resume Prompt: {structured_prompt.prompt}")
+                outputs.append(
+                    await self.json_agent_manager.run(
+                        prompt=structured_prompt.prompt,
+                        max_length=structured_prompt.max_length,
+                        json_schema=structured_prompt.json_schema,
+                        deadline=self.deadline,
+                    )
+                )
+        except DeadlineExceededError:
+            logger.warning("Skipping resume preview, the request deadline passed.")
+            return None
+        raw_output = merge_extractions(outputs)
 
         try:
             resume_preview: ResumePreviewerModel = ResumePreviewerModel.model_validate(
@@ -216,10 +557,12 @@ class ScoreImprovementService:
         )
 
         resume_embedding_task = asyncio.create_task(
-            self.embedding_manager.embed(resume.content)
+            self._get_resume_embedding(resume, processed_resume)
         )
         job_kw_embedding_task = asyncio.create_task(
-            self.embedding_manager.embed(extracted_job_keywords)
+            stored_embedding(
+                self.embedding_manager, extracted_job_keywords, processed_job
+            )
         )
         resume_embedding, extracted_job_keywords_embedding = await asyncio.gather(
             resume_embedding_task, job_kw_embedding_task
@@ -228,14 +571,19 @@ class ScoreImprovementService:
         cosine_similarity_score = self.calculate_cosine_similarity(
             extracted_job_keywords_embedding, resume_embedding
         )
-        updated_resume, updated_score = await self.improve_score_with_llm(
+        async for event in self._improvement_events(
             resume=resume.content,
             extracted_resume_keywords=extracted_resume_keywords,
             job=job.content,
             extracted_job_keywords=extracted_job_keywords,
             previous_cosine_similarity_score=cosine_similarity_score,
             extracted_job_keywords_embedding=extracted_job_keywords_embedding,
-        )
+        ):
+            match event:
+                case ("stopped", stop_reason, attempts):
+                    pass
+                case ("result", updated_resume, updated_score):
+                    pass
 
         resume_preview = await self.get_resume_for_previewer(
             updated_resume=updated_resume
@@ -248,6 +596,8 @@ class ScoreImprovementService:
             "job_id": job_id,
             "original_score": cosine_similarity_score,
             "new_score": updated_score,
+            "stop_reason": stop_reason,
+            "attempts": attempts,
             "updated_resume": markdown.markdown(text=updated_resume),
             "resume_preview": resume_preview,
         }
@@ -262,13 +612,11 @@ class ScoreImprovementService:
         """
 
         yield f"data: {json.dumps({'status': 'starting', 'message': 'Analyzing resume and job description...'})}\n\n"
-        await asyncio.sleep(2)
 
         resume, processed_resume = await self._get_resume(resume_id)
         job, processed_job = await self._get_job(job_id)
 
         yield f"data: {json.dumps({'status': 'parsing', 'message': 'Parsing resume content...'})}\n\n"
-        await asyncio.sleep(2)
 
         extracted_job_keywords = ", ".join(
             json.loads(processed_job.extracted_keywords).get("extracted_keywords", [])
@@ -280,13 +628,14 @@ class ScoreImprovementService:
             )
         )
 
-        resume_embedding = await self.embedding_manager.embed(text=resume.content)
-        extracted_job_keywords_embedding = await self.embedding_manager.embed(
-            text=extracted_job_keywords
+        resume_embedding, extracted_job_keywords_embedding = await asyncio.gather(
+            self._get_resume_embedding(resume, processed_resume),
+            stored_embedding(
+                self.embedding_manager, extracted_job_keywords, processed_job
+            ),
         )
 
         yield f"data: {json.dumps({'status': 'scoring', 'message': 'Calculating compatibility score...'})}\n\n"
-        await asyncio.sleep(3)
 
         cosine_similarity_score = self.calculate_cosine_similarity(
             extracted_job_keywords_embedding, resume_embedding
@@ -295,26 +644,35 @@ class ScoreImprovementService:
         yield f"data: {json.dumps({'status': 'scored', 'score': cosine_similarity_score})}\n\n"
 
         yield f"data: {json.dumps({'status': 'improving', 'message': 'Generating improvement suggestions...'})}\n\n"
-        await asyncio.sleep(3)
 
-        updated_resume, updated_score = await self.improve_score_with_llm(
+        index = 0
+        async for event in self._improvement_events(
             resume=resume.content,
             extracted_resume_keywords=extracted_resume_keywords,
             job=job.content,
             extracted_job_keywords=extracted_job_keywords,
             previous_cosine_similarity_score=cosine_similarity_score,
             extracted_job_keywords_embedding=extracted_job_keywords_embedding,
-        )
-
-        for i, suggestion in enumerate(updated_resume):
-            yield f"data: {json.dumps({'status': 'suggestion', 'index': i, 'text': suggestion})}\n\n"
-            await asyncio.sleep(0.2)
+            stream_tokens=True,
+        ):
+            match event:
+                case ("token", attempt, chunk):
+                    yield f"data: {json.dumps({'status': 'suggestion', 'attempt': attempt, 'index': index, 'text': chunk})}\n\n"
+                    index += 1
+                case ("scored", attempt, attempt_score):
+                    yield f"data: {json.dumps({'status': 'attempt_scored', 'attempt': attempt, 'score': attempt_score})}\n\n"
+                case ("stopped", stop_reason, attempts):
+                    pass
+                case ("result", updated_resume, updated_score):
+                    pass
 
         final_result = {
             "resume_id": resume_id,
             "job_id": job_id,
             "original_score": cosine_similarity_score,
             "new_score": updated_score,
+            "stop_reason": stop_reason,
+            "attempts": attempts,
             "updated_resume": markdown.markdown(text=updated_resume),
         }
 
@@ -0,0 +1,240 @@
+import re
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.prompt import split_into_chunks
+
+# StructuredResumeModel alias -> words that identify its markdown heading,
+# checked in order so e.g. "Research Projects" is research and "Technical
+# Projects" a project
+SECTION_KEYWORDS = {
+    "Research Work": ("research", "publication", "paper"),
+    "Projects": ("project",),
+    "Experiences": ("experience", "employment", "work history"),
+    "Education": ("education", "academic", "qualification"),
+    "Skills": ("skill", "technolog", "competenc"),
+    "Achievements": (
+        "achievement",
+        "award",
+        "honor",
+        "honour",
+        "certification",
+        "accomplishment",
+    ),
+}
+
+# StructuredResumeModel alias -> complete heading lines accepted from bold and
+# plain-text lines, which are far more often job titles or project names
+# ("Technical Lead", "Research Assistant") than headings
+SECTION_HEADINGS = {
+    "Research Work": (
+        "research",
+        "research work",
+        "research experience",
+        "research projects",
+        "publications",
+        "selected publications",
+        "papers",
+        "research and publications",
+        "publications and research",
+    ),
+    "Projects": (
+        "projects",
+        "personal projects",
+        "academic projects",
+        "key projects",
+        "selected projects",
+        "technical projects",
+        "side projects",
+        "open source projects",
+        "project experience",
+    ),
+    "Experiences": (
+        "experience",
+        "work experience",
+        "professional experience",
+        "relevant experience",
+        "employment",
+        "employment history",
+        "work history",
+        "career history",
+        "internships",
+        "internship experience",
+    ),
+    "Education": (
+        "education",
+        "educational background",
+        "academic background",
+        "academics",
+        "education and training",
+        "academic qualifications",
+        "qualifications",
+    ),
+    "Skills": (
+        "skills",
+        "key skills",
+        "core skills",
+        "technical skills",
+        "skills summary",
+        "skills and tools",
+        "skills and technologies",
+        "technologies",
+        "tools and technologies",
+        "competencies",
+        "core competencies",
+        "technical proficiencies",
+    ),
+    "Achievements": (
+        "achievements",
+        "accomplishments",
+        "awards",
+        "honors",
+        "honours",
+        "certifications",
+        "certificates",
+        "awards and honors",
+        "honors and awards",
+        "awards and achievements",
+        "achievements and awards",
+        "licenses and certifications",
+    ),
+}
+_HEADING_KEYS = {
+    heading: key for key, headings in SECTION_HEADINGS.items() for heading in headings
+}
+
+_MARKDOWN_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.+?)\s*#*\s*$")
+_BOLD_LINE = re.compile(r"^\s*(?:\*\*|__)(.+?)(?:\*\*|__)\s*:?\s*$")
+
+
+class ResumeSection(NamedTuple):
+    heading: str
+    # StructuredResumeModel alias, None for the header and unrecognised sections
+    key: Optional[str]
+    text: str
+
+
+def classify_heading(heading: str) -> Optional[str]:
+    """
+    Returns the StructuredResumeModel alias a section heading belongs to, if any.
+    """
+    heading = heading.lower()
+    for key, words in SECTION_KEYWORDS.items():
+        if any(word in heading for word in words):
+            return key
+    return None
+
+
+def _known_heading(line: str) -> Optional[str]:
+    """
+    Returns the StructuredResumeModel alias if the whole line is a known
+    section heading such as "Work Experience" or "Skills & Tools".
+    """
+    words = re.sub(r"[^a-z ]", " ", line.lower().replace("&", " and ")).split()
+    return _HEADING_KEYS.get(" ".join(words))
+
+
+def _heading_of(line: str) -> Optional[Tuple[str, Optional[int], Optional[str]]]:
+    """
+    Returns `(heading, level, key)` if the line is a heading. Level is the
+    markdown heading depth, or None for bold and plain-text headings; key is the
+    StructuredResumeModel alias it maps to, if any.
+
+    Markdown headings are classified by keyword. Bold lines are headings, but
+    only map to a section when they name one exactly, and plain lines are only
+    headings when they do.
+    """
+    match = _MARKDOWN_HEADING.match(line)
+    if match:
+        heading = match.group(2).strip()
+        return heading, len(match.group(1)), classify_heading(heading)
+    match = _BOLD_LINE.match(line)
+    if match:
+        heading = match.group(1).strip()
+        return heading, None, _known_heading(heading)
+
+    stripped = line.strip().rstrip(":")
+    key = _known_heading(stripped) if stripped else None
+    if key is not None:
+        return stripped, None, key
+    return None
+
+
+def split_resume_sections(markdown: str) -> List[ResumeSection]:
+    """
+    Splits converted resume markdown at its section headings. Text before the
+    first heading becomes a section with an empty heading.
+
+    Inside a recognised section, only a markdown heading at the same or a
+    higher level, or (for sections not opened by a markdown heading) a line
+    naming another section, starts a new one. Job titles, project names and
+    deeper sub-headings stay part of the section:
+
+    >>> resume = "\\n".join([
+    ...     "Jane Doe",
+    ...     "Experience",
+    ...     "**Technical Lead**",
+    ...     "Led the platform team.",
+    ...     "Research Assistant",
+    ...     "Project Manager, Acme",
+    ...     "Skills",
+    ...     "Python, SQL",
+    ... ])
+    >>> [(s.heading, s.key) for s in split_resume_sections(resume)]
+    [('', None), ('Experience', 'Experiences'), ('Skills', 'Skills')]
+    """
+    sections: List[ResumeSection] = []
+    heading, key, level, lines = "", None, None, []
+
+    def _close() -> None:
+        if heading or any(line.strip() for line in lines):
+            sections.append(ResumeSection(heading, key, "\n".join(lines)))
+
+    for line in markdown.splitlines():
+        found = _heading_of(line)
+        if found is None:
+            lines.append(line)
+            continue
+
+        next_heading, next_level, next_key = found
+        if key is not None:
+            if level is not None:
+                nested = next_level is None or next_level > level
+            else:
+                nested = next_level is None and next_key is None
+            if nested:
+                lines.append(line)
+                continue
+
+        _close()
+        heading, key, level, lines = next_heading, next_key, next_level, [line]
+    _close()
+    return sections
+
+
+def group_resume_sections(markdown: str) -> Dict[Optional[str], str]:
+    """
+    Joins the text of all sections that map to the same StructuredResumeModel
+    alias. The `None` group holds the header and unrecognised sections, which
+    is where contact details and summaries live.
+    """
+    groups: Dict[Optional[str], List[str]] = {}
+    for section in split_resume_sections(markdown):
+        groups.setdefault(section.key, []).append(section.text.strip())
+    return {key: "\n\n".join(texts) for key, texts in groups.items()}
+
+
+def resume_embedding_chunks(markdown: str, max_tokens: int) -> List[str]:
+    """
+    Splits a resume into section-aligned chunks of at most `max_tokens` for
+    chunk-level embeddings. Chunks only depend on their own section's text, so
+    a rewrite that leaves a section untouched yields identical chunks for it.
+    """
+    chunks: List[str] = []
+    for section in split_resume_sections(markdown):
+        chunks.extend(
+            chunk
+            for chunk in split_into_chunks(section.text, max_tokens)
+            if chunk.strip()
+        )
+    return chunks or [markdown]
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import numpy as np
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Sequence, Set, Tuple
+
+from app.models import ProcessedJob
+from app.agent import EmbeddingManager
+from .embeddings import stored_embeddings, job_keywords_text
+
+logger = logging.getLogger(__name__)
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """
+    Row-wise L2 normalization. All-zero rows are left as zeros.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class JobVectorIndex:
+    """
+    In-memory matrix of L2-normalized job keyword embeddings.
+
+    Built lazily from the `processed_jobs` table for one embedding model, updated
+    as new jobs are stored and re-synced with the table before every lookup, so
+    ranking every job against a resume is a single matrix-vector product.
+    """
+
+    # job ids per `IN (...)` query, well below SQLite's bound parameter limit
+    _LOAD_BATCH_SIZE = 500
+
+    def __init__(self) -> None:
+        self._model: str | None = None
+        self._job_ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        # jobs without extracted keywords, which have nothing to embed
+        self._skipped: Set[str] = set()
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._job_ids)
+
+    async def ensure_loaded(
+        self, db: AsyncSession, embedding_manager: EmbeddingManager
+    ) -> None:
+        """
+        Syncs the index with `processed_jobs` for the manager's embedding model.
+
+        The first call (or one for another model) loads every job; later calls
+        only load jobs the index does not have yet, such as jobs stored by
+        another process or whose ingest-time embedding failed. Jobs without a
+        vector for the model are embedded and persisted.
+        """
+        model_name = embedding_manager.model_name()
+        async with self._lock:
+            if self._model != model_name:
+                self._model = model_name
+                self._job_ids, self._positions, self._skipped = [], {}, set()
+                self._matrix = np.empty((0, 0), dtype=np.float32)
+
+            stored = await db.scalars(select(ProcessedJob.job_id))
+            missing = [
+                job_id
+                for job_id in stored
+                if job_id not in self._positions and job_id not in self._skipped
+            ]
+            if not missing:
+                return
+
+            rows: List[ProcessedJob] = []
+            for start in range(0, len(missing), self._LOAD_BATCH_SIZE):
+                batch = missing[start : start + self._LOAD_BATCH_SIZE]
+                rows.extend(
+                    await db.scalars(
+                        select(ProcessedJob).where(ProcessedJob.job_id.in_(batch))
+                    )
+                )
+
+            embeddable = []
+            for row in rows:
+                text = job_keywords_text(row)
+                if text:
+                    embeddable.append((row, text))
+                else:
+                    self._skipped.add(row.job_id)
+            embeddings = await stored_embeddings(
+                embedding_manager,
+                [text for _, text in embeddable],
+                [row for row, _ in embeddable],
+            )
+            self._extend([row.job_id for row, _ in embeddable], embeddings)
+            logger.info(
+                f"Job vector index synced: {len(embeddable)} jobs added, {len(self)} total."
+            )
+
+    def add(
+        self, job_id: str, embedding: Sequence[float] | np.ndarray, model_name: str
+    ) -> None:
+        """
+        Adds (or replaces) a job vector. Ignored until the index is loaded for
+        `model_name`, since the next load reads the job from the database anyway.
+        """
+        if self._model != model_name:
+            return
+        self._extend([job_id], [embedding])
+
+    def _extend(
+        self,
+        job_ids: List[str],
+        embeddings: Sequence[Sequence[float] | np.ndarray],
+    ) -> None:
+        if not job_ids:
+            return
+        rows = l2_normalize(np.vstack(embeddings))
+        if len(self._job_ids) and rows.shape[1] != self._matrix.shape[1]:
+            logger.warning(
+                f"Skipping {len(job_ids)} jobs: embedding dimension {rows.shape[1]} does not match index."
+            )
+            return
+
+        new_ids, new_rows = [], []
+        for job_id, row in zip(job_ids, rows):
+            if job_id in self._positions:
+                self._matrix[self._positions[job_id]] = row
+            else:
+                self._positions[job_id] = len(self._job_ids) + len(new_ids)
+                new_ids.append(job_id)
+                new_rows.append(row)
+        if not new_ids:
+            return
+        self._matrix = np.vstack(
+            [self._matrix, *new_rows] if len(self._job_ids) else new_rows
+        )
+        self._job_ids.extend(new_ids)
+
+    def top_k(
+        self, query: Sequence[float] | np.ndarray, k: int
+    ) -> List[Tuple[str, float]]:
+        """
+        Returns up to `k` `(job_id, cosine_similarity)` pairs, best match first.
+        """
+        if not self._job_ids:
+            return []
+
+        scores = self._matrix @ l2_normalize(query)[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._job_ids[i], float(scores[i])) for i in top]
+
+
+job_vector_index = JobVectorIndex()